@@ -5,7 +5,11 @@
 # game description: https://pl.wikipedia.org/wiki/Hexapawn
 
 # pip install easyAI
-from easyAI import TwoPlayerGame, AI_Player, Human_Player, Negamax
+from easyAI import TwoPlayerGame, AI_Player, Human_Player
+
+from bitboard import Bitboard, CAPTURE, unpack
+from search import AlphaBeta
+from transposition import Zobrist
 
 
 class GameController(TwoPlayerGame):
@@ -20,20 +24,25 @@ class GameController(TwoPlayerGame):
             Self object.
         """
         self.size = size
+        self.bitboard = Bitboard(size)
         num_pawns, len_board = size
         # p = position
         p = [[(i, j) for j in range(len_board)]
              for i in [0, num_pawns - 1]]
 
-        for i, d, goal, pawns in [(0, 1, num_pawns - 1,
-                                   p[0]), (1, -1, 0, p[1])]:
-            players[i].direction = d
-            players[i].goal_line = goal
-            players[i].pawns = pawns
+        # Whole position lives here, players are never modified,
+        # index 0 is player 1 and index 1 is player 2
+        self.directions = [1, -1]
+        self.goal_lines = [num_pawns - 1, 0]
+        self.boards = [self.bitboard.from_pawns(pawns) for pawns in p]
 
         # Define the players
         self.players = players
 
+        # Zobrist hash of the pawns, updated by make_move
+        self.zobrist = Zobrist(num_pawns * len_board)
+        self.hash = self.zobrist.hash(self.boards)
+
         # Define who starts first
         self.nplayer = 1
         self.current_player = 1
@@ -45,49 +54,86 @@ class GameController(TwoPlayerGame):
         self.to_tuple = lambda s: (self.alphabets.index(s[0]),
                                    int(s[1:]) - 1)
 
-        # Convert (1, 3) to B4
-        # [(1, 3), (2, 3)] == B4 C4
-        # [(1, 3), (2, 3)] == move[0][0] == 1, move[0][1] + 1 == 4
-        # move[0][0] == 1 == alphabets[1] == B
-        self.to_string = lambda move: ' '.join([self.alphabets[
-                                                    move[i][0]] + str(move[i][1] + 1)
-                                                for i in (0, 1)])
+        # Convert packed move to B4 C4
+        # origin bit 7 on 4x4 board == (1, 3) == B4
+        # (1, 3) == alphabets[1] == B, 3 + 1 == 4
+        self.to_string = lambda move: ' '.join([
+            self.alphabets[i] + str(j + 1)
+            for i, j in map(self.bitboard.coords, unpack(move))])
+
+    def to_move(self, text):
+        """
+        Convert a move typed by a player to its packed form.
+
+        Parameters:
+            text (str): Move, example: "A1 B1"
+
+        Returns:
+            int: Packed move
+        """
+        a, b = [self.bitboard.square(*self.to_tuple(s))
+                for s in text.split(' ')]
+        flag = CAPTURE if self.boards[self.opponent_index - 1] >> b & 1 else 0
+        return flag | a << 8 | b
 
     # Define the possible moves
     def possible_moves(self):
         """
         Returns:
-            List of possible moves.
+            List of possible moves, packed as ints.
         """
-        moves = []
-        opponent_pawns = self.opponent.pawns
-        d = self.player.direction
+        i = self.current_player - 1
+        return self.bitboard.moves(self.boards[i], self.boards[1 - i],
+                                   self.directions[i])
 
-        for i, j in self.player.pawns:
-            if (i + d, j) not in opponent_pawns:
-                moves.append(((i, j), (i + d, j)))
-
-            if (i + d, j + 1) in opponent_pawns:
-                moves.append(((i, j), (i + d, j + 1)))
+    def make_move(self, move):
+        """
+        Define how to make a move.
 
-            if (i + d, j - 1) in opponent_pawns:
-                moves.append(((i, j), (i + d, j - 1)))
+        Parameters:
+            move (int): Accepts the player's chosen packed move,
+                        a text move like "A1 B1" is converted first
+        """
+        if isinstance(move, str):
+            move = self.to_move(move)
 
-        return list(map(self.to_string, [(i, j) for i, j in moves]))
+        self.toggle(move)
 
-    def make_move(self, move):
+    def unmake_move(self, move):
         """
-        Define how to make a move.
+        Take back a move made with make_move, restoring a captured pawn.
+        Lets easyAI and AlphaBeta search in place instead of copying the game.
 
         Parameters:
-            move (str): Accepts the player's chosen move, example: "A1 B1"
+            move (int): Packed move, current player must be the one who made it
+        """
+        self.toggle(move)
+
+    def toggle(self, move):
+        """
+        Xor a packed move into the boards and the hash, so doing it twice
+        leaves the position unchanged.
+        """
+        i = self.current_player - 1
+        a, b = move >> 8 & 0xff, move & 0xff
+        keys = self.zobrist.keys
+        self.boards[i] ^= 1 << a | 1 << b
+        self.hash ^= keys[i][a] ^ keys[i][b]
+
+        if move & CAPTURE:
+            self.boards[1 - i] ^= 1 << b
+            self.hash ^= keys[1 - i][b]
+
+    def ttentry(self):
         """
-        move = list(map(self.to_tuple, move.split(' ')))
-        ind = self.player.pawns.index(move[0])
-        self.player.pawns[ind] = move[1]
+        Key of the position for the transposition table.
 
-        if move[1] in self.opponent.pawns:
-            self.opponent.pawns.remove(move[1])
+        Returns:
+            int: Zobrist hash of the pawns and the side to move
+        """
+        if self.current_player == 2:
+            return self.hash ^ self.zobrist.side
+        return self.hash
 
     def loss_condition(self):
         """
@@ -100,9 +146,47 @@ class GameController(TwoPlayerGame):
         Returns:
             Bool: True or False
         """
-        return (any([i == self.opponent.goal_line
-                     for i, j in self.opponent.pawns])
-                or (self.possible_moves() == []))
+        i = self.current_player - 1
+        goal = self.bitboard.row_masks[self.goal_lines[1 - i]]
+        return (self.boards[1 - i] & goal != 0
+                or not self.bitboard.has_moves(self.boards[i],
+                                               self.boards[1 - i],
+                                               self.directions[i]))
+
+    # Play the game, printing moves as text
+    def play(self, nmoves=1000, verbose=True):
+        """
+        Same as TwoPlayerGame.play, but moves are printed with to_string and
+        the game is not deep-copied after every move.
+
+        Parameters:
+            nmoves (int): Limit of moves to play
+            verbose (bool): Print the board after every move
+
+        Returns:
+            List of played moves.
+        """
+        history = []
+
+        if verbose:
+            self.show()
+
+        for self.nmove in range(1, nmoves + 1):
+            if self.is_over():
+                break
+
+            move = self.player.ask_move(self)
+            history.append(move)
+            self.make_move(move)
+
+            if verbose:
+                print('\nMove #%d: player %d plays %s :'
+                      % (self.nmove, self.current_player, self.to_string(move)))
+                self.show()
+
+            self.switch_player()
+
+        return history
 
     # Check if the game is over
     def is_over(self):
@@ -113,23 +197,48 @@ class GameController(TwoPlayerGame):
         """
         Function is printing board, pawns and fields.
         """
-        f = lambda x: '1' if x in self.players[0].pawns else (
-            '2' if x in self.players[1].pawns else '.')
+        bit = lambda x: 1 << self.bitboard.square(*x)
+        f = lambda x: '1' if bit(x) & self.boards[0] else (
+            '2' if bit(x) & self.boards[1] else '.')
 
         print("\n".join([" ".join([f((i, j))
                                    for j in range(self.size[1])])
                          for i in range(self.size[0])]))
 
 
-if __name__ == '__main__':
-    # Compute the score
-    scoring = lambda game: -100 if game.loss_condition() else 0
+class TextHumanPlayer(Human_Player):
+    """
+    Human player typing moves as text, example: "A1 B1".
+    """
+
+    def ask_move(self, game):
+        """
+        Parameters:
+            game (GameController): Game in which the player moves
+
+        Returns:
+            int: Packed move chosen by the player
+        """
+        moves = game.possible_moves()
+        names = [game.to_string(move) for move in moves]
+
+        while True:
+            move = input('\nPlayer %s what do you play ? ' % game.current_player)
 
-    # Define the algorithm
-    algorithm = Negamax(2, scoring)
+            if move == 'show moves':
+                print('Possible moves:\n' + '\n'.join(names))
+            elif move == 'quit':
+                raise KeyboardInterrupt
+            elif move in names:
+                return moves[names.index(move)]
+
+
+if __name__ == '__main__':
+    # Define the algorithm, answer within one second
+    algorithm = AlphaBeta(time_budget=1.0)
 
     # Start the game
-    game = GameController([Human_Player(),
+    game = GameController([TextHumanPlayer(),
                            AI_Player(algorithm)])
     game.play()
     print('\nPlayer', game.current_player, 'wins after', game.nmove, 'turns')
@@ -0,0 +1,143 @@
+# https://www.chessprogramming.org/Bitboards
+# https://www.chessprogramming.org/General_Setwise_Operations
+# https://www.chessprogramming.org/Encoding_Moves
+
+# Moves are packed into one int: origin square in bits 8-15,
+# destination square in bits 0-7 and CAPTURE set when the destination
+# holds an opponent pawn.
+CAPTURE = 1 << 16
+
+
+class Bitboard:
+    """
+    Integer bitboard geometry of a Hexapawn board.
+
+    Square (i, j) is stored in bit i * cols + j, so a whole side is one int.
+    Moving one row forward is a shift by cols, diagonal captures are shifts
+    by cols + 1 / cols - 1 with the edge column masked out first so pawns
+    never wrap around to the other side of the board.
+    """
+
+    def __init__(self, size):
+        """
+        Parameters:
+            size (tuple): Number of rows and columns of the board
+
+        Returns:
+            Self object.
+        """
+        self.rows, self.cols = size
+        self.full = (1 << (self.rows * self.cols)) - 1
+
+        row = (1 << self.cols) - 1
+        self.row_masks = [row << (i * self.cols) for i in range(self.rows)]
+
+        first_col = 0
+        for i in range(self.rows):
+            first_col |= 1 << (i * self.cols)
+        self.not_first_col = self.full & ~first_col
+        self.not_last_col = self.full & ~(first_col << (self.cols - 1))
+
+    def __deepcopy__(self, memo):
+        # Geometry never changes, every copy of a game can share it
+        return self
+
+    def square(self, i, j):
+        """
+        Convert (row, column) to a bit index.
+        """
+        return i * self.cols + j
+
+    def coords(self, square):
+        """
+        Convert a bit index to (row, column).
+        """
+        return divmod(square, self.cols)
+
+    def from_pawns(self, pawns):
+        """
+        Parameters:
+            pawns (list): List of (row, column) tuples
+
+        Returns:
+            int: Bitboard with a bit set for every pawn
+        """
+        board = 0
+        for i, j in pawns:
+            board |= 1 << self.square(i, j)
+        return board
+
+    def to_pawns(self, board):
+        """
+        Parameters:
+            board (int): Bitboard of one side
+
+        Returns:
+            List of (row, column) tuples.
+        """
+        return [self.coords(square) for square in squares(board)]
+
+    def targets(self, own, opp, d):
+        """
+        Shift-and-mask move generation for one side.
+
+        Parameters:
+            own (int): Bitboard of the side to move
+            opp (int): Bitboard of the opponent
+            d (int): Direction of the side to move, 1 or -1
+
+        Returns:
+            List of (offset, targets, flag) triples, where targets is the
+            bitboard of destination squares, offset is destination minus
+            origin and flag is CAPTURE for the diagonal moves.
+        """
+        cols = self.cols
+        empty = self.full & ~(own | opp)
+        right = own & self.not_last_col
+        left = own & self.not_first_col
+
+        if d == 1:
+            return [(cols, (own << cols) & empty, 0),
+                    (cols + 1, (right << (cols + 1)) & opp, CAPTURE),
+                    (cols - 1, (left << (cols - 1)) & opp, CAPTURE)]
+
+        return [(-cols, (own >> cols) & empty, 0),
+                (1 - cols, (right >> (cols - 1)) & opp, CAPTURE),
+                (-1 - cols, (left >> (cols + 1)) & opp, CAPTURE)]
+
+    def moves(self, own, opp, d):
+        """
+        Returns:
+            List of packed moves.
+        """
+        moves = []
+        for offset, targets, flag in self.targets(own, opp, d):
+            for square in squares(targets):
+                moves.append(flag | (square - offset) << 8 | square)
+        return moves
+
+    def has_moves(self, own, opp, d):
+        """
+        Returns:
+            Bool: True if the side to move has at least one legal move
+        """
+        return any(targets for offset, targets, flag
+                   in self.targets(own, opp, d))
+
+
+def squares(board):
+    """
+    Iterate over the indices of the set bits of a bitboard, lowest first.
+    """
+    while board:
+        low = board & -board
+        yield low.bit_length() - 1
+        board ^= low
+
+
+def unpack(move):
+    """
+    Returns:
+        Tuple of the origin and destination bit indices of a packed move.
+    """
+    return move >> 8 & 0xff, move & 0xff
@@ -0,0 +1,221 @@
+# https://www.chessprogramming.org/Alpha-Beta
+# https://www.chessprogramming.org/Iterative_Deepening
+# https://www.chessprogramming.org/Killer_Heuristic
+
+import time
+
+from bitboard import CAPTURE
+from transposition import TranspositionTable
+
+# Same flags as easyAI's Negamax
+LOWERBOUND, EXACT, UPPERBOUND = -1, 0, 1
+
+# Score of a won game, minus the number of plies needed to win it
+WIN = 10000
+MAX_PLY = 256
+INF = WIN + 1
+
+
+class SearchTimeout(Exception):
+    """
+    Raised inside the search when the time budget is used up.
+    """
+
+
+def material(game):
+    """
+    Default scoring, pawns of the side to move minus pawns of the opponent.
+    """
+    i = game.current_player - 1
+    return bin(game.boards[i]).count('1') - bin(game.boards[1 - i]).count('1')
+
+
+class AlphaBeta:
+    """
+    Iterative deepening alpha-beta search with a per-move time budget.
+
+    Can be used in place of easyAI's Negamax: AI_Player(AlphaBeta(1.0)).
+    Every iteration searches one ply deeper, trying the transposition table
+    move first, then captures, then killer moves. When the budget runs out
+    the move of the last finished iteration is played; depth 1 is always
+    finished so the AI never answers without a move.
+    """
+
+    def __init__(self, time_budget=1.0, max_depth=64, scoring=None, tt=None):
+        """
+        Parameters:
+            time_budget (float): Seconds per move, None to search up to max_depth
+            max_depth (int): Deepest iteration
+            scoring (function): f(game) -> score of a position for the side
+                                to move, material() by default
+            tt (TranspositionTable): Table shared between moves
+
+        Returns:
+            Self object.
+        """
+        self.time_budget = time_budget
+        self.max_depth = min(max_depth, MAX_PLY - 1)
+        self.scoring = scoring if scoring else material
+        self.tt = tt if tt is not None else TranspositionTable()
+
+        # Statistics of the last search
+        self.nodes = 0
+        self.depth = 0
+        self.score = 0
+        self.elapsed = 0.0
+
+    def __call__(self, game):
+        """
+        Returns:
+            Best move for the current player of the game.
+        """
+        start = time.perf_counter()
+        self.deadline = None if self.time_budget is None else start + self.time_budget
+        self.killers = [[None, None] for _ in range(self.max_depth + 1)]
+        self.nodes = 0
+        self.depth = 0
+        best_move = None
+
+        for depth in range(1, self.max_depth + 1):
+            # The first iteration always finishes
+            self.check_time = depth > 1 and self.deadline is not None
+            self.horizon = False
+
+            try:
+                self.score = self.search(game, depth, 0, -INF, INF)
+            except SearchTimeout:
+                break
+
+            best_move, self.depth = self.root_move, depth
+
+            # Game decided, or the whole tree fits in this depth
+            if abs(self.score) > WIN - MAX_PLY or not self.horizon:
+                break
+
+        self.elapsed = time.perf_counter() - start
+        return best_move
+
+    def search(self, game, depth, ply, alpha, beta):
+        """
+        Negamax with alpha-beta pruning.
+
+        Parameters:
+            game (GameController): Position to search
+            depth (int): Plies left to search
+            ply (int): Plies from the root
+            alpha (float): Lower bound of the window
+            beta (float): Upper bound of the window
+
+        Returns:
+            Score of the position for the side to move.
+        """
+        self.nodes += 1
+        if (self.check_time and not self.nodes & 255
+                and time.perf_counter() > self.deadline):
+            raise SearchTimeout
+
+        if game.loss_condition():
+            return ply - WIN
+
+        if depth == 0:
+            self.horizon = True
+            return self.scoring(game)
+
+        alpha_orig = alpha
+        tt_move = None
+        entry = self.tt.lookup(game)
+
+        if entry is not None:
+            tt_move = entry['move']
+
+            if ply > 0 and entry['depth'] >= depth:
+                value = from_tt(entry['value'], ply)
+                if abs(value) <= WIN - MAX_PLY:
+                    self.horizon = True
+
+                if entry['flag'] == EXACT:
+                    return value
+                elif entry['flag'] == LOWERBOUND:
+                    alpha = max(alpha, value)
+                else:
+                    beta = min(beta, value)
+
+                if alpha >= beta:
+                    return value
+
+        moves = self.order(game.possible_moves(), ply, tt_move)
+        best_value = -INF
+        best_move = moves[0]
+
+        for move in moves:
+            game.make_move(move)
+            game.switch_player()
+            try:
+                value = -self.search(game, depth - 1, ply + 1, -beta, -alpha)
+            finally:
+                # Also restores the position when the search times out
+                game.switch_player()
+                game.unmake_move(move)
+
+            if value > best_value:
+                best_value, best_move = value, move
+                if ply == 0:
+                    self.root_move = move
+
+            alpha = max(alpha, value)
+            if alpha >= beta:
+                killers = self.killers[ply]
+                if not move & CAPTURE and move != killers[0]:
+                    killers[1], killers[0] = killers[0], move
+                break
+
+        if best_value <= alpha_orig:
+            flag = UPPERBOUND
+        elif best_value >= beta:
+            flag = LOWERBOUND
+        else:
+            flag = EXACT
+
+        self.tt.store(game=game, depth=depth, value=to_tt(best_value, ply),
+                      move=best_move, flag=flag)
+        return best_value
+
+    def order(self, moves, ply, tt_move):
+        """
+        Sort moves: transposition table move, captures, killers, the rest.
+        """
+        killers = self.killers[ply]
+
+        def rank(move):
+            if move == tt_move:
+                return 0
+            if move & CAPTURE:
+                return 1
+            if move in killers:
+                return 2
+            return 3
+
+        moves.sort(key=rank)
+        return moves
+
+
+def to_tt(value, ply):
+    """
+    Win and loss scores are stored relative to the position, not the root.
+    """
+    if value > WIN - MAX_PLY:
+        return value + ply
+    if value < MAX_PLY - WIN:
+        return value - ply
+    return value
+
+
+def from_tt(value, ply):
+    """
+    Inverse of to_tt.
+    """
+    if value > WIN - MAX_PLY:
+        return value - ply
+    if value < MAX_PLY - WIN:
+        return value + ply
+    return value
@@ -0,0 +1,152 @@
+"""
+Headless AI vs AI Hexapawn matches, run in parallel on all cores.
+
+Every game is played by two AlphaBeta engines searching to a fixed depth.
+The first plies of a game are random (seeded) so the games differ. For every
+board size and depth it prints the win rate of player 1, the average game
+length (nmove) and the search speed in nodes per second:
+
+    python selfplay.py --sizes 4x4 5x5 6x6 --depths 2 4 6 --games 1000
+"""
+
+import argparse
+import json
+import os
+import random
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+from easyAI import AI_Player
+
+from Hexapawn import GameController
+from search import AlphaBeta
+
+
+class SelfPlayPlayer(AI_Player):
+    """
+    AI player that plays random moves first and counts searched nodes.
+    """
+
+    def __init__(self, AI_algo, rng, random_plies):
+        """
+        Parameters:
+            AI_algo (AlphaBeta): Search engine
+            rng (random.Random): Source of the random moves
+            random_plies (int): Number of random plies at the start
+
+        Returns:
+            Self object.
+        """
+        super().__init__(AI_algo)
+        self.rng = rng
+        self.random_plies = random_plies
+        self.nodes = 0
+        self.elapsed = 0.0
+
+    def ask_move(self, game):
+        if game.nmove <= self.random_plies:
+            return self.rng.choice(game.possible_moves())
+
+        move = self.AI_algo(game)
+        self.nodes += self.AI_algo.nodes
+        self.elapsed += self.AI_algo.elapsed
+        return move
+
+
+def play_game(job):
+    """
+    Parameters:
+        job (tuple): Board size, search depth, seed and random plies
+
+    Returns:
+        Dict with the result and the search statistics of the game.
+    """
+    size, depth, seed, random_plies = job
+    rng = random.Random(seed)
+    players = [SelfPlayPlayer(AlphaBeta(time_budget=None, max_depth=depth),
+                              rng, random_plies) for _ in (0, 1)]
+
+    game = GameController(players, size)
+    game.play(verbose=False)
+
+    return {'size': size,
+            'depth': depth,
+            'winner': game.opponent_index,
+            'nmove': game.nmove,
+            'nodes': sum(player.nodes for player in players),
+            'elapsed': sum(player.elapsed for player in players)}
+
+
+def summarize(results):
+    """
+    Parameters:
+        results (list): Dicts returned by play_game
+
+    Returns:
+        List of dicts with games, win rate of player 1, average nmove and
+        nodes per second for every board size and depth.
+    """
+    groups = defaultdict(list)
+    for result in results:
+        groups[(tuple(result['size']), result['depth'])].append(result)
+
+    summary = []
+    for (size, depth), games in sorted(groups.items()):
+        nodes = sum(game['nodes'] for game in games)
+        elapsed = sum(game['elapsed'] for game in games)
+        summary.append({'size': '%dx%d' % size,
+                        'depth': depth,
+                        'games': len(games),
+                        'player1_win_rate': sum(game['winner'] == 1 for game in games) / len(games),
+                        'average_nmove': sum(game['nmove'] for game in games) / len(games),
+                        'nodes_per_second': nodes / elapsed if elapsed else 0.0})
+    return summary
+
+
+def parse_size(text):
+    rows, cols = text.lower().split('x')
+    return int(rows), int(cols)
+
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(description='Play AI vs AI Hexapawn games in parallel')
+    parser.add_argument('--sizes', dest='sizes', type=parse_size, nargs='+', default=[(4, 4)],
+                        help='Board sizes, example: 4x4 5x5')
+    parser.add_argument('--depths', dest='depths', type=int, nargs='+', default=[2, 4],
+                        help='Search depths of both players')
+    parser.add_argument('--games', dest='games', type=int, default=100,
+                        help='Games per board size and depth')
+    parser.add_argument('--random-plies', dest='random_plies', type=int, default=2,
+                        help='Random plies at the start of every game')
+    parser.add_argument('--workers', dest='workers', type=int, default=os.cpu_count(),
+                        help='Number of processes')
+    parser.add_argument('--seed', dest='seed', type=int, default=0,
+                        help='Seed of the first game')
+    parser.add_argument('--output', dest='output',
+                        help='Write the summary to this JSON file')
+    return parser
+
+
+if __name__ == '__main__':
+    args = build_arg_parser().parse_args()
+
+    jobs = [(size, depth, args.seed + i, args.random_plies)
+            for size in args.sizes
+            for depth in args.depths
+            for i in range(args.games)]
+
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        chunksize = max(1, len(jobs) // (4 * args.workers))
+        results = list(executor.map(play_game, jobs, chunksize=chunksize))
+
+    summary = summarize(results)
+
+    print('size   depth   games   p1 wins   avg nmove   nodes/s')
+    for row in summary:
+        print('%-6s %5d %7d %8.1f%% %11.2f %9.0f'
+              % (row['size'], row['depth'], row['games'], 100 * row['player1_win_rate'],
+                 row['average_nmove'], row['nodes_per_second']))
+
+    if args.output:
+        with open(args.output, 'w', encoding='UTF-8') as f:
+            json.dump(summary, f, indent=2)
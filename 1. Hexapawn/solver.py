@@ -0,0 +1,230 @@
+# https://www.chessprogramming.org/Retrograde_Analysis
+# https://en.wikipedia.org/wiki/Open_addressing
+
+"""
+Solve Hexapawn for a board size and store the result in a table file.
+
+Pawns only move forward, so no position can repeat and every game ends.
+The solver walks all positions reachable from the start once and assigns
+every one its distance to the end of the game, working back from the
+positions where the game is over. The side to move wins when the distance
+is odd and loses when it is even, so one byte per position is enough.
+
+The file is an open addressing hash table that is read through mmap, so
+a lookup is a few byte comparisons and many processes can share one copy:
+
+    python solver.py --size 4 4 --output hexapawn_4x4.tbl
+
+    game = GameController([Human_Player(),
+                           AI_Player(SolutionTable('hexapawn_4x4.tbl'))])
+"""
+
+import argparse
+import mmap
+import struct
+import sys
+import time
+
+from easyAI import AI_Player
+
+from Hexapawn import GameController
+
+# magic, rows, cols, key bytes, capacity
+HEADER = struct.Struct('<4sBBBxQ')
+MAGIC = b'HXPT'
+MULTIPLIER = 0x9E3779B97F4A7C15
+MASK64 = (1 << 64) - 1
+
+
+def position_key(game):
+    """
+    Returns:
+        int: Both bitboards and the side to move in one number, never 0
+    """
+    n = game.bitboard.rows * game.bitboard.cols
+    return (game.boards[0] | game.boards[1] << n
+            | (game.current_player - 1) << (2 * n))
+
+
+def solve(game):
+    """
+    Parameters:
+        game (GameController): Start position, left unchanged
+
+    Returns:
+        Dict position key -> number of plies to the end of the game.
+    """
+    distances = {}
+
+    def visit():
+        key = position_key(game)
+        distance = distances.get(key)
+        if distance is not None:
+            return distance
+
+        if game.loss_condition():
+            distance = 0
+        else:
+            win = None
+            loss = 0
+            for move in game.possible_moves():
+                game.make_move(move)
+                game.switch_player()
+                child = visit()
+                game.switch_player()
+                game.unmake_move(move)
+
+                # Even distance: opponent loses, take the quickest win,
+                # otherwise drag the loss out as long as possible
+                if child % 2 == 0:
+                    win = child + 1 if win is None else min(win, child + 1)
+                else:
+                    loss = max(loss, child + 1)
+            distance = loss if win is None else win
+
+        distances[key] = distance
+        return distance
+
+    visit()
+    return distances
+
+
+def slot(key, capacity):
+    """
+    Fibonacci hashing, the top bits of the key times the golden ratio
+    pick one of capacity (a power of two) slots.
+    """
+    h = ((key ^ key >> 64) * MULTIPLIER) & MASK64
+    return h >> (65 - capacity.bit_length())
+
+
+def write_table(path, size, distances):
+    """
+    Save solved positions as an open addressing table, half of the slots
+    stay empty so lookups stay short.
+
+    Parameters:
+        path (str): Output file
+        size (tuple): Board size the positions belong to
+        distances (dict): Result of solve()
+    """
+    rows, cols = size
+    key_bytes = (2 * rows * cols + 8) // 8
+    record = key_bytes + 1
+    capacity = 1
+    while capacity < 2 * len(distances):
+        capacity *= 2
+
+    data = bytearray(capacity * record)
+    empty = bytes(key_bytes)
+    for key, distance in distances.items():
+        i = slot(key, capacity)
+        while data[i * record:i * record + key_bytes] != empty:
+            i = (i + 1) % capacity
+        data[i * record:i * record + key_bytes] = key.to_bytes(key_bytes, 'little')
+        data[i * record + key_bytes] = distance
+
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, rows, cols, key_bytes, capacity))
+        f.write(data)
+
+
+class SolutionTable:
+    """
+    Memory-mapped table written by write_table.
+
+    Can be used as an AI: AI_Player(SolutionTable(path)) plays perfectly,
+    it probes the position after every possible move and picks the
+    quickest win or, in a lost position, the longest defence.
+    """
+
+    def __init__(self, path):
+        """
+        Parameters:
+            path (str): Table file
+
+        Returns:
+            Self object.
+        """
+        with open(path, 'rb') as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, rows, cols, self.key_bytes, self.capacity = \
+            HEADER.unpack_from(self.data)
+        if magic != MAGIC:
+            raise ValueError(path + ' is not a Hexapawn solution table')
+
+        self.size = (rows, cols)
+        self.record = self.key_bytes + 1
+
+    def probe(self, game):
+        """
+        Returns:
+            int: Plies to the end of the game, odd if the side to move wins,
+                 None if the position is not in the table
+        """
+        key = position_key(game)
+        i = slot(key, self.capacity)
+        key = key.to_bytes(self.key_bytes, 'little')
+        empty = bytes(self.key_bytes)
+
+        while True:
+            offset = HEADER.size + i * self.record
+            stored = self.data[offset:offset + self.key_bytes]
+            if stored == key:
+                return self.data[offset + self.key_bytes]
+            if stored == empty:
+                return None
+            i = (i + 1) % self.capacity
+
+    def __call__(self, game):
+        """
+        Returns:
+            Best move for the current player of the game.
+        """
+        if tuple(game.size) != self.size:
+            raise ValueError('Table is for board size ' + str(self.size))
+
+        best_move = None
+        best_rank = None
+        for move in game.possible_moves():
+            game.make_move(move)
+            game.switch_player()
+            distance = self.probe(game)
+            game.switch_player()
+            game.unmake_move(move)
+
+            # Opponent loses on even distances: prefer those, shortest first,
+            # then the longest of the lost lines
+            rank = (distance % 2, distance if distance % 2 == 0 else -distance)
+            if best_rank is None or rank < best_rank:
+                best_move, best_rank = move, rank
+
+        return best_move
+
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(description='Solve Hexapawn and save the solution table')
+    parser.add_argument('--size', dest='size', type=int, nargs=2, default=[4, 4],
+                        metavar=('ROWS', 'COLS'), help='Board size')
+    parser.add_argument('--output', dest='output', required=True,
+                        help='Table file to write')
+    return parser
+
+
+if __name__ == '__main__':
+    args = build_arg_parser().parse_args()
+    size = tuple(args.size)
+
+    # Deepest line is one ply per row and pawn
+    sys.setrecursionlimit(max(1000, 4 * size[0] * size[1]))
+
+    start = time.perf_counter()
+    game = GameController([AI_Player(None), AI_Player(None)], size)
+    distances = solve(game)
+    write_table(args.output, size, distances)
+
+    first = distances[position_key(game)]
+    print('Positions:', len(distances))
+    print('Player', 1 if first % 2 else 2, 'wins in', first, 'plies')
+    print('Time:', round(time.perf_counter() - start, 2), 's')
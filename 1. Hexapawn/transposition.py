@@ -0,0 +1,136 @@
+# https://www.chessprogramming.org/Zobrist_Hashing
+# https://www.chessprogramming.org/Transposition_Table
+
+import random
+
+from bitboard import squares
+
+
+class Zobrist:
+    """
+    Random 64-bit keys for every (side, square) pair and for the side to
+    move. The hash of a position is the xor of the keys of all pawns, so
+    a move only needs to xor out the origin and xor in the destination.
+    """
+
+    def __init__(self, n_squares, seed=0):
+        """
+        Parameters:
+            n_squares (int): Number of squares on the board
+            seed (int): Seed of the random keys
+
+        Returns:
+            Self object.
+        """
+        rng = random.Random(seed)
+        self.keys = [[rng.getrandbits(64) for _ in range(n_squares)]
+                     for _ in (0, 1)]
+        self.side = rng.getrandbits(64)
+
+    def __deepcopy__(self, memo):
+        # Keys never change, every copy of a game can share them
+        return self
+
+    def hash(self, boards):
+        """
+        Parameters:
+            boards (list): Bitboards of both sides
+
+        Returns:
+            int: Hash of the pawns, without the side to move
+        """
+        h = 0
+        for keys, board in zip(self.keys, boards):
+            for square in squares(board):
+                h ^= keys[square]
+        return h
+
+
+class TranspositionTable:
+    """
+    Bounded transposition table for easyAI's Negamax.
+
+    Entries live in a fixed number of slots indexed by the Zobrist key
+    returned by game.ttentry(). When two positions fall into the same slot
+    the new entry replaces the old one if it is the same position, if the
+    old one was stored on an earlier turn (game.nmove) or if the new one was
+    searched at least as deep; otherwise the new entry is dropped.
+    """
+
+    def __init__(self, size=1 << 16):
+        """
+        Parameters:
+            size (int): Number of slots
+
+        Returns:
+            Self object.
+        """
+        self.size = size
+        self.slots = [None] * size
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.replaced = 0
+        self.rejected = 0
+
+    def lookup(self, game):
+        """
+        Returns:
+            Dict with depth, value, move and flag of the position,
+            None if the position is not in the table.
+        """
+        key = game.ttentry()
+        entry = self.slots[key % self.size]
+
+        if entry is not None and entry['key'] == key:
+            self.hits += 1
+            return entry
+
+        self.misses += 1
+        return None
+
+    def store(self, **data):
+        """
+        Store an entry, called by Negamax with game, depth, value, move and
+        flag keyword arguments.
+        """
+        game = data.pop('game')
+        data['key'] = key = game.ttentry()
+        data['age'] = getattr(game, 'nmove', 0)
+        slot = key % self.size
+        entry = self.slots[slot]
+
+        if entry is not None and entry['key'] != key:
+            if entry['age'] == data['age'] and entry['depth'] > data['depth']:
+                self.rejected += 1
+                return
+            self.replaced += 1
+
+        self.stores += 1
+        self.slots[slot] = data
+
+    def __call__(self, game):
+        """
+        Use the table as an AI, it only works for stored positions.
+        """
+        return self.lookup(game)['move']
+
+    def clear(self):
+        """
+        Remove all entries and reset the counters.
+        """
+        self.__init__(self.size)
+
+    def stats(self):
+        """
+        Returns:
+            Dict with the counters, the hit rate and the number of used slots.
+        """
+        probes = self.hits + self.misses
+        return {'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / probes if probes else 0.0,
+                'stores': self.stores,
+                'replaced': self.replaced,
+                'rejected': self.rejected,
+                'used': self.size - self.slots.count(None)}
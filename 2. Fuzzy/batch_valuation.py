@@ -0,0 +1,180 @@
+# https://pythonhosted.org/scikit-fuzzy/
+# https://numpy.org/doc/stable/user/basics.broadcasting.html
+
+"""
+Vectorized car valuation for many cars at once.
+
+Follows the same Mamdani steps as ControlSystemSimulation.compute(), but
+every step works on whole NumPy arrays instead of one car:
+ * fuzzification: membership of every input term by np.interp
+ * rules: AND / OR / NOT of the term memberships (fmin / fmax / 1 - x)
+ * accumulation: fmax of the firing strengths per consequent term
+ * defuzzification: centroid of the clipped and aggregated consequent
+
+skfuzzy adds the points where a consequent term crosses its cut level to the
+output universe before it computes the centroid. Here every interval of the
+universe gets a candidate crossing point per term (the interval's left end
+when the term does not cross there, which adds a zero-width segment), so all
+cars share one array shape and give the same values as compute().
+
+Usage:
+    batch = BatchValuation(valuation.control_system())
+    batch(np.array([300000, 150000]), np.array([2010, 2015]), np.array([3, 1]))
+"""
+
+import numpy as np
+from skfuzzy.control.term import Term, TermAggregate
+
+
+class BatchValuation:
+    """
+    Array version of ControlSystemSimulation.compute() for one consequent.
+    """
+
+    def __init__(self, control_system, chunk_size=10000):
+        """
+        Parameters:
+            control_system (ctrl.ControlSystem): Rules to evaluate
+            chunk_size (int): Cars evaluated together, bounds the memory used
+                              by the defuzzification arrays
+
+        Returns:
+            Self object.
+        """
+        self.rules = list(control_system.rules)
+        self.antecedents = list(control_system.antecedents)
+        consequents = list(control_system.consequents)
+        if len(consequents) != 1:
+            raise ValueError('Only control systems with one consequent are supported')
+
+        self.consequent = consequents[0]
+        self.terms = list(self.consequent.terms.values())
+        self.chunk_size = chunk_size
+
+    def __call__(self, mileage, year, body):
+        """
+        Parameters:
+            mileage (np.ndarray): Car mileages [km]
+            year (np.ndarray): Production years
+            body (np.ndarray): 1 - hatchback, 2 - sedan, 3 - estate wagon
+
+        Returns:
+            np.ndarray: Value of every car, NaN where no rule fires
+        """
+        return self.evaluate({'mileage': mileage, 'year': year, 'body': body})
+
+    def evaluate(self, inputs):
+        """
+        Parameters:
+            inputs (dict): Antecedent label -> array of crisp values
+
+        Returns:
+            np.ndarray: Defuzzified consequent for every row of the inputs.
+        """
+        inputs = {label: np.atleast_1d(np.asarray(values, dtype=float))
+                  for label, values in inputs.items()}
+        n = len(next(iter(inputs.values())))
+        output = np.empty(n)
+
+        for start in range(0, n, self.chunk_size):
+            chunk = {label: values[start:start + self.chunk_size]
+                     for label, values in inputs.items()}
+            output[start:start + self.chunk_size] = self.defuzz(self.cuts(chunk))
+
+        return output
+
+    def cuts(self, inputs):
+        """
+        Fuzzify the inputs and fire every rule.
+
+        Returns:
+            np.ndarray: Cut level of every consequent term, shape (terms, cars)
+        """
+        memberships = {}
+        for antecedent in self.antecedents:
+            # Same as clip_to_bounds of ControlSystemSimulation
+            universe = antecedent.universe
+            x = np.clip(inputs[antecedent.label], universe.min(), universe.max())
+            for term in antecedent.terms.values():
+                memberships[id(term)] = np.interp(x, universe, term.mf)
+
+        n = len(x)
+        cuts = {id(term): np.zeros(n) for term in self.terms}
+        fired = {id(term): False for term in self.terms}
+
+        for rule in self.rules:
+            firing = self.firing(rule.antecedent, memberships, rule.and_func, rule.or_func)
+            for consequent in rule.consequent:
+                key = id(consequent.term)
+                activation = firing * consequent.weight
+                if fired[key]:
+                    cuts[key] = self.consequent.accumulation_method(activation, cuts[key])
+                else:
+                    cuts[key] = np.broadcast_to(activation, n)
+                    fired[key] = True
+
+        return np.array([cuts[id(term)] for term in self.terms])
+
+    def firing(self, antecedent, memberships, and_func, or_func):
+        """
+        Returns:
+            np.ndarray: Firing strength of an antecedent expression
+        """
+        if isinstance(antecedent, Term):
+            return memberships[id(antecedent)]
+
+        assert isinstance(antecedent, TermAggregate)
+        first = self.firing(antecedent.term1, memberships, and_func, or_func)
+        if antecedent.kind == 'not':
+            return 1.0 - first
+
+        second = self.firing(antecedent.term2, memberships, and_func, or_func)
+        if antecedent.kind == 'and':
+            return and_func(first, second)
+        return or_func(first, second)
+
+    def defuzz(self, cuts):
+        """
+        Centroid of max over terms of min(cut, term membership), for every car.
+
+        Parameters:
+            cuts (np.ndarray): Result of cuts, shape (terms, cars)
+
+        Returns:
+            np.ndarray: Defuzzified value of every car.
+        """
+        universe = self.consequent.universe.astype(float)
+        n = cuts.shape[1]
+        left, right = universe[:-1], universe[1:]
+
+        # Universe points plus a candidate crossing point per term and interval
+        points = [np.broadcast_to(universe, (n, len(universe)))]
+        for term, cut in zip(self.terms, cuts):
+            mf = term.mf.astype(float)
+            low, high = mf[:-1], mf[1:]
+            c = cut[:, np.newaxis]
+
+            # Same transitions as skfuzzy's _interp_universe_fast
+            above = np.where(c == 0.0, mf > c, mf >= c)
+            crossing = above[:, :-1] != above[:, 1:]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                x = left + (c - low) * (right - left) / (high - low)
+            points.append(np.where(crossing, x, left))
+
+        points = np.sort(np.concatenate(points, axis=1), axis=1)
+
+        mfx = np.zeros_like(points)
+        for term, cut in zip(self.terms, cuts):
+            upsampled = np.interp(points, universe, term.mf, left=0.0, right=0.0)
+            np.maximum(mfx, np.minimum(cut[:, np.newaxis], upsampled), out=mfx)
+
+        # Exact centroid of the piecewise linear membership, segment by segment
+        x1, x2 = points[:, :-1], points[:, 1:]
+        y1, y2 = mfx[:, :-1], mfx[:, 1:]
+        width = x2 - x1
+        area = 0.5 * width * (y1 + y2)
+        moment = width * width * (y2 + 0.5 * y1) / 3.0 + x1 * area
+
+        total = area.sum(axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(mfx.sum(axis=1) == 0, np.nan, moment.sum(axis=1) / total)
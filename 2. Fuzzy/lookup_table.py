@@ -0,0 +1,199 @@
+# https://en.wikipedia.org/wiki/Lookup_table
+# https://en.wikipedia.org/wiki/Trilinear_interpolation
+
+"""
+Compiled car valuation.
+
+Mileage, year and body live on bounded, evenly spaced universes, so the
+defuzzified value can be computed once for every point of a grid over them
+and later queries are answered by trilinear interpolation between the
+eight surrounding grid points, without running the fuzzy rules at all.
+
+The grid values come from BatchValuation, which gives the same values as
+compute() for all grid points at once. The error of the table is measured
+the same way against the exact value at every grid point, cell centre and
+edge and face midpoint (the grid with half the step), so it is the worst
+case over that dense set, not over every possible input.
+
+To compile the table and measure its error:
+python lookup_table.py --output value_table.npz
+
+Usage:
+    table = ValuationTable.load('value_table.npz')
+    table(300000, 2010, 3)
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+import valuation
+from batch_valuation import BatchValuation
+
+
+class ValuationTable:
+    """
+    Defuzzified value on a regular grid of mileage x year x body.
+
+    Grid points where no rule fires hold NaN and are left out of the
+    interpolation.
+    """
+
+    def __init__(self, axes, values, max_error=None, nan_mismatches=None):
+        """
+        Parameters:
+            axes (list): (start, step, count) of the mileage, year and body grid
+            values (np.ndarray): Value for every grid point, shape of the counts
+            max_error (float): Largest difference from the exact value on the
+                               half step grid of measure_error, None if not
+                               measured
+            nan_mismatches (int): Points of that grid where only one of the
+                                  table and the exact valuation has a value
+
+        Returns:
+            Self object.
+        """
+        self.axes = [(float(start), float(step), int(count))
+                     for start, step, count in axes]
+        self.values = np.asarray(values, dtype=float)
+        self.max_error = max_error
+        self.nan_mismatches = nan_mismatches
+
+    @classmethod
+    def compile(cls, batch, mileage, year, body):
+        """
+        Evaluate every point of the grid in one batch.
+
+        Parameters:
+            batch (BatchValuation): Exact valuation
+            mileage (np.ndarray): Evenly spaced mileage grid
+            year (np.ndarray): Evenly spaced year grid
+            body (np.ndarray): Evenly spaced body grid
+
+        Returns:
+            ValuationTable.
+        """
+        grids = [np.asarray(grid, dtype=float) for grid in (mileage, year, body)]
+        points = np.meshgrid(*grids, indexing='ij')
+        values = batch(*[axis.ravel() for axis in points]).reshape(points[0].shape)
+
+        axes = [(grid[0], grid[1] - grid[0] if len(grid) > 1 else 1.0, len(grid))
+                for grid in grids]
+        return cls(axes, values)
+
+    def __call__(self, mileage, year, body):
+        """
+        Parameters:
+            mileage (float): Car mileage [km]
+            year (float): Production year
+            body (float): 1 - hatchback, 2 - sedan, 3 - estate wagon
+
+        Returns:
+            float: Interpolated value, inputs outside the grid are clipped
+        """
+        index = []
+        weight = []
+        for x, (start, step, count) in zip((mileage, year, body), self.axes):
+            t = min(max((x - start) / step, 0.0), count - 1.0)
+            i = min(int(t), count - 2) if count > 1 else 0
+            index.append(i)
+            weight.append(t - i)
+
+        (i, j, k), (u, v, w) = index, weight
+        c = self.values[i:i + 2, j:j + 2, k:k + 2]
+        if c.shape != (2, 2, 2):
+            c = np.pad(c, [(0, 2 - n) for n in c.shape], mode='edge')
+
+        weights = np.multiply.outer(np.multiply.outer([1 - u, u], [1 - v, v]), [1 - w, w])
+        known = ~np.isnan(c)
+        if known.all():
+            return float((weights * c).sum())
+
+        total = weights[known].sum()
+        return float((weights[known] * c[known]).sum() / total) if total else np.nan
+
+    def measure_error(self, batch):
+        """
+        Compare the table with the exact valuation on the grid with half the
+        step: every grid point, cell centre and edge and face midpoint. The
+        largest difference is kept as max_error, the worst case over these
+        points; inputs between them can still be a little worse.
+
+        Points where one side gives NaN (no rule fires) and the other a value
+        are not differences, they are counted as nan_mismatches.
+
+        Parameters:
+            batch (BatchValuation): Exact valuation
+
+        Returns:
+            Tuple of the largest and the mean absolute difference (None if
+            no point has a value on both sides) and the number of NaN
+            mismatches.
+        """
+        grids = [start + step / 2 * np.arange(2 * count - 1)
+                 for start, step, count in self.axes]
+        points = [axis.ravel() for axis in np.meshgrid(*grids, indexing='ij')]
+
+        exact = batch(*points)
+        table = np.array([self(m, y, b) for m, y, b in zip(*points)])
+
+        mismatches = int((np.isnan(table) != np.isnan(exact)).sum())
+        errors = np.abs(table - exact)[~np.isnan(table) & ~np.isnan(exact)]
+
+        self.max_error = float(errors.max()) if len(errors) else None
+        self.nan_mismatches = mismatches
+        return self.max_error, float(errors.mean()) if len(errors) else None, mismatches
+
+    def save(self, path):
+        """
+        Save the table to a .npz file.
+        """
+        np.savez(path, axes=np.array(self.axes), values=self.values,
+                 max_error=np.nan if self.max_error is None else self.max_error,
+                 nan_mismatches=-1 if self.nan_mismatches is None else self.nan_mismatches)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load a table saved with save.
+        """
+        with np.load(path) as data:
+            error = float(data['max_error'])
+            mismatches = int(data['nan_mismatches'])
+            return cls(data['axes'], data['values'], None if np.isnan(error) else error,
+                       None if mismatches < 0 else mismatches)
+
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(description='Compile the car valuation into a lookup table')
+    parser.add_argument('--output', dest='output', default='value_table.npz',
+                        help='Table file to write')
+    return parser
+
+
+if __name__ == '__main__':
+    args = build_arg_parser().parse_args()
+    variables = valuation.variables()
+
+    batch = BatchValuation(valuation.control_system())
+
+    start = time.perf_counter()
+    table = ValuationTable.compile(batch, variables['mileage'].universe,
+                                   variables['year'].universe, variables['body'].universe)
+    print('Compiled', table.values.size, 'points in', round(time.perf_counter() - start, 1), 's')
+
+    max_error, mean_error, mismatches = table.measure_error(batch)
+    if max_error is None:
+        print('Error against compute(): no point of the half step grid has a value')
+    else:
+        print('Error against compute() over the half step grid (worst case of those points):'
+              ' max', round(max_error, 2), 'mean', round(mean_error, 2))
+    print('Points with a value on one side only:', mismatches)
+
+    table.save(args.output)
+
+    start = time.perf_counter()
+    for _ in range(10000):
+        table(300000, 2010, 3)
+    print('Lookup:', round((time.perf_counter() - start) / 10000 * 1e6, 1), 'us')
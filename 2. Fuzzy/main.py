@@ -59,130 +59,112 @@ Creating the Tipping Controller Using the skfuzzy control API
 We can use the `skfuzzy` control system API to model this.  First, let's
 define fuzzy variables
 """
-import matplotlib.pyplot as plt
-import numpy as np
-import skfuzzy as fuzz
-from skfuzzy import control as ctrl
-
-mileage = ctrl.Antecedent(np.arange(10000, 500000, 5000), 'mileage')
-year = ctrl.Antecedent(np.arange(1997, 2019, 1), 'year')
-body = ctrl.Antecedent(np.arange(1, 4, 1), 'body')
-value = ctrl.Consequent(np.arange(7500, 75000, 1500), 'value')
-
-mileage.automf(5)
-year.automf(5)
-names = ['hatchback', 'sedan', 'estate wagon']
-body.automf(names=names)
-
-value['lowest'] = fuzz.trimf(value.universe, [7500, 7500, 10000])
-value['lower'] = fuzz.trimf(value.universe, [10000, 15000, 20000])
-value['low'] = fuzz.trimf(value.universe, [20000, 30000, 40000])
-value['average'] = fuzz.trimf(value.universe, [30000, 40000, 50000])
-value['high'] = fuzz.trimf(value.universe, [40000, 50000, 60000])
-value['higher'] = fuzz.trimf(value.universe, [60000, 65000, 70000])
-value['highest'] = fuzz.trimf(value.universe, [70000, 75000, 75000])
-
-rule1 = ctrl.Rule(antecedent=((mileage['good'] & year['poor'] & body['hatchback']) |
-                              (mileage['decent'] & year['poor'] & body['hatchback'])),
-                  consequent=value['lowest'])
-
-rule2 = ctrl.Rule(antecedent=((mileage['good'] & year['mediocre'] & body['hatchback']) |
-                              (mileage['decent'] & year['mediocre'] & body['hatchback']) |
-                              (mileage['average'] & year['poor'] & body['hatchback']) |
-                              (mileage['good'] & year['poor'] & body['sedan']) |
-                              (mileage['good'] & year['poor'] & body['estate wagon'])),
-                  consequent=value['lower'])
-
-rule3 = ctrl.Rule(antecedent=((mileage['good'] & year['average'] & body['hatchback']) |
-                              (mileage['good'] & year['decent'] & body['hatchback']) |
-                              (mileage['decent'] & year['average'] & body['hatchback']) |
-                              (mileage['mediocre'] & year['poor'] & body['hatchback']) |
-                              (mileage['poor'] & year['mediocre'] & body['hatchback']) |
-                              (mileage['decent'] & year['mediocre'] & body['sedan']) |
-                              (mileage['average'] & year['mediocre'] & body['sedan']) |
-                              (mileage['good'] & year['mediocre'] & body['sedan']) |
-                              (mileage['decent'] & year['poor'] & body['sedan']) |
-                              (mileage['good'] & year['average'] & body['sedan']) |
-                              (mileage['average'] & year['poor'] & body['sedan']) |
-                              (mileage['decent'] & year['mediocre'] & body['estate wagon']) |
-                              (mileage['good'] & year['mediocre'] & body['estate wagon']) |
-                              (mileage['decent'] & year['poor'] & body['estate wagon']) |
-                              (mileage['average'] & year['poor'] & body['estate wagon'])),
-                  consequent=value['low'])
-
-rule4 = ctrl.Rule(antecedent=((mileage['good'] & year['good'] & body['hatchback']) |
-                              (mileage['poor'] & year['poor'] & body['hatchback']) |
-                              (mileage['decent'] & year['decent'] & body['hatchback']) |
-                              (mileage['mediocre'] & year['mediocre'] & body['hatchback']) |
-                              (mileage['average'] & year['average'] & body['hatchback']) |
-                              (mileage['decent'] & year['good'] & body['hatchback']) |
-                              (mileage['average'] & year['decent'] & body['hatchback']) |
-                              (mileage['mediocre'] & year['average'] & body['hatchback']) |
-                              (mileage['poor'] & year['average'] & body['hatchback']) |
-                              (mileage['good'] & year['good'] & body['sedan']) |
-                              (mileage['poor'] & year['poor'] & body['sedan']) |
-                              (mileage['decent'] & year['decent'] & body['sedan']) |
-                              (mileage['mediocre'] & year['mediocre'] & body['sedan']) |
-                              (mileage['average'] & year['average'] & body['sedan']) |
-                              (mileage['good'] & year['decent'] & body['sedan']) |
-                              (mileage['decent'] & year['good'] & body['sedan']) |
-                              (mileage['mediocre'] & year['poor'] & body['sedan']) |
-                              (mileage['poor'] & year['mediocre'] & body['sedan']) |
-                              (mileage['average'] & year['decent'] & body['sedan']) |
-                              (mileage['decent'] & year['average'] & body['sedan']) |
-                              (mileage['mediocre'] & year['average'] & body['sedan']) |
-                              (mileage['average'] & year['mediocre'] & body['sedan']) |
-                              (mileage['good'] & year['good'] & body['estate wagon']) |
-                              (mileage['poor'] & year['poor'] & body['estate wagon']) |
-                              (mileage['decent'] & year['decent'] & body['estate wagon']) |
-                              (mileage['mediocre'] & year['mediocre'] & body['estate wagon']) |
-                              (mileage['average'] & year['average'] & body['estate wagon']) |
-                              (mileage['good'] & year['average'] & body['estate wagon']) |
-                              (mileage['good'] & year['decent'] & body['estate wagon']) |
-                              (mileage['decent'] & year['average'] & body['estate wagon']) |
-                              (mileage['average'] & year['mediocre'] & body['estate wagon']) |
-                              (mileage['mediocre'] & year['poor'] & body['estate wagon'])),
-                  consequent=value['average'])
-
-rule5 = ctrl.Rule(antecedent=((mileage['average'] & year['good'] & body['hatchback']) |
-                              (mileage['mediocre'] & year['decent'] & body['hatchback']) |
-                              (mileage['mediocre'] & year['good'] & body['hatchback']) |
-                              (mileage['poor'] & year['decent'] & body['hatchback']) |
-                              (mileage['mediocre'] & year['decent'] & body['sedan']) |
-                              (mileage['poor'] & year['decent'] & body['sedan']) |
-                              (mileage['mediocre'] & year['good'] & body['sedan']) |
-                              (mileage['average'] & year['good'] & body['sedan']) |
-                              (mileage['poor'] & year['average'] & body['sedan']) |
-                              (mileage['decent'] & year['good'] & body['estate wagon']) |
-                              (mileage['average'] & year['decent'] & body['estate wagon']) |
-                              (mileage['average'] & year['good'] & body['estate wagon']) |
-                              (mileage['mediocre'] & year['average'] & body['estate wagon']) |
-                              (mileage['mediocre'] & year['decent'] & body['estate wagon']) |
-                              (mileage['poor'] & year['mediocre'] & body['estate wagon']) |
-                              (mileage['poor'] & year['average'] & body['estate wagon'])),
-                  consequent=value['high'])
-
-rule6 = ctrl.Rule(antecedent=((mileage['poor'] & year['good'] & body['hatchback']) |
-                              (mileage['good'] & year['good'] & body['sedan']) |
-                              (mileage['mediocre'] & year['good'] & body['estate wagon']) |
-                              (mileage['poor'] & year['decent'] & body['estate wagon'])),
-                  consequent=value['higher'])
-
-rule7 = ctrl.Rule(antecedent=(mileage['poor'] & year['good'] & body['estate wagon']),
-                  consequent=value['highest'])
-
-
-value_ctrl = ctrl.ControlSystem([rule1, rule2, rule3, rule4, rule5, rule6, rule7])
-
-valuation = ctrl.ControlSystemSimulation(value_ctrl)
-
-valuation.input['mileage'] = 300000
-valuation.input['year'] = 2010
-valuation.input['body'] = 3
-
-valuation.compute()
-
-print(valuation.output['value'])
-value.view(sim=valuation)
-
-plt.show()
+import argparse
+import json
+import math
+import sys
+
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(description='Estimate the value of a car')
+    parser.add_argument('--mileage', dest='mileage', type=float, default=300000,
+                        help='Car mileage [km]')
+    parser.add_argument('--year', dest='year', type=float, default=2010,
+                        help='Production year')
+    parser.add_argument('--body', dest='body', default='3',
+                        help='1 - hatchback, 2 - sedan, 3 - estate wagon (or the name)')
+    parser.add_argument('--serve', dest='serve', action='store_true',
+                        help='Read JSON lines of cars from stdin, write valuations to stdout')
+    parser.add_argument('--cache-size', dest='cache_size', type=int, default=0,
+                        help='Cache this many (mileage, year, body) buckets in --serve mode; '
+                             'inputs are rounded to 5000 km, 1 year and the body class, '
+                             '0 (default) computes every car exactly')
+    parser.add_argument('--no-plot', dest='plot', action='store_false',
+                        help='Do not show the value membership plot')
+    parser.add_argument('--check-rules', dest='check_rules', action='store_true',
+                        help='List the conflicts and gaps of the rule table and exit')
+    return parser
+
+
+def parse_body(body):
+    """
+    Parameters:
+        body (int, float or str): Body number or name, example: 3, "sedan"
+
+    Returns:
+        float: Value of the body antecedent
+    """
+    import valuation
+
+    if isinstance(body, str) and body in valuation.BODY_TYPES:
+        return valuation.BODY_TYPES.index(body) + 1.0
+    return float(body)
+
+
+def serve(lines, out, cache_size=0):
+    """
+    Value every car of a stream of JSON lines.
+
+    Every line is an object with mileage, year and body; it is written back
+    with a "value" field (null if no rule fires) or an "error" field, also
+    for values that are not finite numbers (NaN, Infinity).
+
+    Parameters:
+        lines (iterable): Input lines, example: sys.stdin
+        out (file): Output stream, flushed after every line
+        cache_size (int): Size of the CachedValuation in front of the rules,
+                          0 to compute every car exactly. The cache rounds
+                          the inputs, so its values may differ from exact ones
+
+    Returns:
+        Dict with the cache statistics, None without a cache.
+    """
+    import valuation
+
+    evaluate = valuation.CachedValuation(cache_size) if cache_size else valuation.evaluate
+
+    for line in lines:
+        if not line.strip():
+            continue
+
+        try:
+            car = json.loads(line)
+            value = evaluate(*valuation.check_inputs(car['mileage'], car['year'],
+                                                     parse_body(car['body'])))
+            car['value'] = None if math.isnan(value) else float(value)
+        except (ValueError, KeyError, TypeError) as e:
+            car = {'input': line.strip(), 'error': repr(e)}
+
+        out.write(json.dumps(car, ensure_ascii=False) + '\n')
+        out.flush()
+
+    return evaluate.stats() if cache_size else None
+
+
+if __name__ == '__main__':
+    args = build_arg_parser().parse_args()
+
+    if args.serve or args.check_rules or not args.plot:
+        # skfuzzy imports matplotlib.pyplot whenever it is installed,
+        # mark it missing so headless runs skip that import
+        sys.modules['matplotlib'] = None
+
+    import valuation
+
+    if args.check_rules:
+        issues = valuation.table_issues()
+        for issue in issues:
+            print(issue)
+        print(len(issues), 'issues in the rule table')
+    elif args.serve:
+        stats = serve(sys.stdin, sys.stdout, args.cache_size)
+        if stats:
+            print('Cache:', stats, file=sys.stderr)
+    else:
+        print(valuation.evaluate(args.mileage, args.year, parse_body(args.body)))
+
+        if args.plot:
+            import matplotlib.pyplot as plt
+
+            valuation.variables()['value'].view(sim=valuation.simulation())
+            plt.show()
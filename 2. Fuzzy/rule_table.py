@@ -0,0 +1,165 @@
+# https://en.wikipedia.org/wiki/Fuzzy_associative_matrix
+# https://pythonhosted.org/scikit-fuzzy/api/skfuzzy.control.html
+
+"""
+Car value rules as a table.
+
+The table holds one cell for every mileage x year x body combination:
+    table[body][mileage index][year index] = consequent label
+with mileage and year terms in the order of the variable (poor ... good).
+A cell may also be a tuple of labels (all of them fire, which is flagged
+as a conflict) or None (no rule fires, flagged as a gap).
+
+build_rules turns the table into one ctrl.Rule per consequent. Cells with
+the same year, consequent and set of bodies are merged into one
+(mileage OR mileage ...) AND year AND (body OR body ...) clause, so the
+rule graph is much smaller than one AND clause per cell. A term list that
+covers the whole variable is kept as an OR of all its terms: their
+memberships do not add up to 1 between the term peaks, so leaving it out
+would change the valuation of cars between two terms.
+
+check_table is not run by build_rules, call it to review a table.
+"""
+
+import itertools
+from collections import defaultdict
+from functools import reduce
+from operator import or_
+
+from skfuzzy import control as ctrl
+from skfuzzy.control.term import TermAggregate
+
+
+def cell_labels(cell):
+    """
+    Returns:
+        Tuple of the consequent labels of a table cell.
+    """
+    if cell is None:
+        return ()
+    if isinstance(cell, str):
+        return (cell,)
+    return tuple(cell)
+
+
+def check_table(table, mileage, year, body):
+    """
+    Parameters:
+        table (dict): Body label -> mileage x year grid of consequents
+        mileage (ctrl.Antecedent): Mileage variable
+        year (ctrl.Antecedent): Year variable
+        body (ctrl.Antecedent): Body variable
+
+    Returns:
+        List of messages about conflicting cells and gaps.
+    """
+    issues = []
+    for m, y, b in itertools.product(mileage.terms, year.terms, body.terms):
+        labels = cell_labels(table[b][list(mileage.terms).index(m)][list(year.terms).index(y)])
+        if len(set(labels)) > 1:
+            issues.append('conflict: %s mileage, %s year, %s -> %s'
+                          % (m, y, b, ', '.join(labels)))
+        elif not labels:
+            issues.append('gap: no rule for %s mileage, %s year, %s' % (m, y, b))
+    return issues
+
+
+def table_from_rules(rules, mileage, year, body):
+    """
+    Convert rules written as OR of (mileage AND year AND body) clauses to a
+    table.
+
+    Returns:
+        Tuple of the table and a list of duplicated and conflicting clauses.
+    """
+    cells = defaultdict(list)
+    for rule in rules:
+        for term in rule.consequent:
+            for clause in split(rule.antecedent, 'or'):
+                labels = {t.parent.label: t.label for t in split(clause, 'and')}
+                cells[(labels[mileage.label], labels[year.label], labels[body.label])] \
+                    .append(term.term.label)
+
+    issues = []
+    table = {b: [[None] * len(year.terms) for _ in mileage.terms] for b in body.terms}
+    for (m, y, b), labels in cells.items():
+        unique = tuple(dict.fromkeys(labels))
+        if len(unique) < len(labels):
+            issues.append('duplicate: %s mileage, %s year, %s -> %s'
+                          % (m, y, b, ', '.join(labels)))
+        if len(unique) > 1:
+            issues.append('conflict: %s mileage, %s year, %s -> %s'
+                          % (m, y, b, ', '.join(unique)))
+        table[b][list(mileage.terms).index(m)][list(year.terms).index(y)] = \
+            unique[0] if len(unique) == 1 else unique
+
+    return table, issues
+
+
+def split(term, kind):
+    """
+    Returns:
+        List of the operands of a chain of kind ('and' / 'or') aggregates.
+    """
+    if isinstance(term, TermAggregate) and term.kind == kind:
+        return split(term.term1, kind) + split(term.term2, kind)
+    return [term]
+
+
+def build_rules(table, mileage, year, body, value):
+    """
+    Generate the rules of a table, see check_table for its conflicts and gaps.
+
+    Parameters:
+        table (dict): Body label -> mileage x year grid of consequents
+        mileage (ctrl.Antecedent): Mileage variable
+        year (ctrl.Antecedent): Year variable
+        body (ctrl.Antecedent): Body variable
+        value (ctrl.Consequent): Value variable
+
+    Returns:
+        List of ctrl.Rule, one for every consequent used in the table.
+    """
+    # consequent -> (year, bodies) -> mileages
+    groups = defaultdict(lambda: defaultdict(set))
+    for i, m in enumerate(mileage.terms):
+        for j, y in enumerate(year.terms):
+            bodies = defaultdict(set)
+            for b in body.terms:
+                for label in cell_labels(table[b][i][j]):
+                    bodies[label].add(b)
+            for label, labels in bodies.items():
+                groups[label][(y, frozenset(labels))].add(m)
+
+    rules = []
+    for label in value.terms:
+        if label not in groups:
+            continue
+
+        clauses = []
+        for (y, bodies), mileages in groups[label].items():
+            clauses.append(any_of(mileage, mileages) & year[y] & any_of(body, bodies))
+        rules.append(ctrl.Rule(antecedent=reduce(or_, clauses), consequent=value[label]))
+
+    return rules
+
+
+def any_of(variable, labels):
+    """
+    Returns:
+        OR of the terms of a variable with the labels, in the variable's order.
+    """
+    return reduce(or_, [variable[label] for label in variable.terms if label in labels])
+
+
+def count_nodes(rules):
+    """
+    Returns:
+        int: Number of terms and AND / OR nodes in the antecedents of the rules
+    """
+    def count(term):
+        if isinstance(term, TermAggregate):
+            return 1 + count(term.term1) + (count(term.term2) if term.term2 is not None else 0)
+        return 1
+
+    return sum(count(rule.antecedent) for rule in rules)
@@ -0,0 +1,208 @@
+# Author: Damian Eggert s19766
+# Author: Adrian Paczewski s14973
+
+"""
+Car valuation with fuzzy rules, importable without matplotlib.
+
+The fuzzy variables, the rules and the control system are built on first use
+and then reused by every valuation in the process.
+
+Usage:
+    import valuation
+    valuation.evaluate(300000, 2010, 3)
+"""
+import math
+from functools import lru_cache
+
+import numpy as np
+import skfuzzy as fuzz
+from skfuzzy import control as ctrl
+
+from rule_table import build_rules, check_table
+
+# Body values of the body antecedent, 1 ... 3
+BODY_TYPES = ['hatchback', 'sedan', 'estate wagon']
+
+# Consequent of every mileage x year x body combination, see rule_table.py
+# Rows: mileage poor ... good, columns: year poor ... good
+value_table = {
+    'hatchback': [
+        ['average', 'low', 'average', 'high', 'higher'],
+        ['low', 'average', 'average', 'high', 'high'],
+        ['lower', None, 'average', 'average', 'high'],
+        ['lowest', 'lower', 'low', 'average', 'average'],
+        ['lowest', 'lower', 'low', 'low', 'average'],
+    ],
+    'sedan': [
+        ['average', 'average', 'high', 'high', None],
+        ['average', 'average', 'average', 'high', 'high'],
+        ['low', ('low', 'average'), 'average', 'average', 'high'],
+        ['low', 'low', 'average', 'average', 'average'],
+        ['lower', 'low', 'low', 'average', ('average', 'higher')],
+    ],
+    'estate wagon': [
+        ['average', 'high', 'high', 'higher', 'highest'],
+        ['average', 'average', 'high', 'high', 'higher'],
+        ['low', 'average', 'average', 'high', 'high'],
+        ['low', 'low', 'average', 'average', 'high'],
+        ['lower', 'low', 'average', 'average', 'average'],
+    ],
+}
+
+
+@lru_cache(maxsize=None)
+def variables():
+    """
+    Returns:
+        Dict with the mileage, year and body antecedents and the value consequent.
+    """
+    mileage = ctrl.Antecedent(np.arange(10000, 500000, 5000), 'mileage')
+    year = ctrl.Antecedent(np.arange(1997, 2019, 1), 'year')
+    body = ctrl.Antecedent(np.arange(1, 4, 1), 'body')
+    value = ctrl.Consequent(np.arange(7500, 75000, 1500), 'value')
+
+    mileage.automf(5)
+    year.automf(5)
+    body.automf(names=BODY_TYPES)
+
+    value['lowest'] = fuzz.trimf(value.universe, [7500, 7500, 10000])
+    value['lower'] = fuzz.trimf(value.universe, [10000, 15000, 20000])
+    value['low'] = fuzz.trimf(value.universe, [20000, 30000, 40000])
+    value['average'] = fuzz.trimf(value.universe, [30000, 40000, 50000])
+    value['high'] = fuzz.trimf(value.universe, [40000, 50000, 60000])
+    value['higher'] = fuzz.trimf(value.universe, [60000, 65000, 70000])
+    value['highest'] = fuzz.trimf(value.universe, [70000, 75000, 75000])
+
+    return {'mileage': mileage, 'year': year, 'body': body, 'value': value}
+
+
+@lru_cache(maxsize=None)
+def control_system():
+    """
+    Returns:
+        ctrl.ControlSystem: Rules of value_table, built once
+    """
+    return ctrl.ControlSystem(build_rules(value_table, **variables()))
+
+
+def table_issues():
+    """
+    Returns:
+        List of the conflicts and gaps of value_table, see rule_table.check_table.
+    """
+    return check_table(value_table, *(variables()[label] for label in ('mileage', 'year', 'body')))
+
+
+@lru_cache(maxsize=None)
+def simulation():
+    """
+    Returns:
+        ctrl.ControlSystemSimulation: Simulation shared by evaluate
+    """
+    return ctrl.ControlSystemSimulation(control_system())
+
+
+def compute_value(sim, mileage, year, body):
+    """
+    Parameters:
+        sim (ctrl.ControlSystemSimulation): Simulation to run
+        mileage (float): Car mileage [km]
+        year (float): Production year
+        body (float): 1 - hatchback, 2 - sedan, 3 - estate wagon
+
+    Returns:
+        float: Defuzzified value computed by the fuzzy rules,
+               NaN if no rule fires
+    """
+    sim.input['mileage'] = mileage
+    sim.input['year'] = year
+    sim.input['body'] = body
+    sim.compute()
+    return sim.output.get('value', np.nan)
+
+
+def check_inputs(mileage, year, body):
+    """
+    Raise ValueError unless all inputs are finite numbers, compute() turns
+    NaN into a value of its own.
+
+    Returns:
+        Tuple of the inputs as floats.
+    """
+    inputs = (float(mileage), float(year), float(body))
+    for label, x in zip(('mileage', 'year', 'body'), inputs):
+        if not math.isfinite(x):
+            raise ValueError('%s must be a finite number, got %s' % (label, x))
+    return inputs
+
+
+def evaluate(mileage, year, body):
+    """
+    Value of one car, see compute_value.
+    """
+    return compute_value(simulation(), mileage, year, body)
+
+
+class CachedValuation:
+    """
+    LRU cache in front of the simulation.
+
+    Inputs are checked with check_inputs, clipped to their antecedent
+    universe like compute() does and rounded to its step (5000 km, 1 year,
+    body class) before the lookup, so all cars in one bucket share one
+    compute() call. The value is computed at the rounded inputs.
+    """
+
+    def __init__(self, maxsize=4096):
+        """
+        Parameters:
+            maxsize (int): Number of cached buckets, None for no limit
+
+        Returns:
+            Self object.
+        """
+        self.grids = []
+        for label in ('mileage', 'year', 'body'):
+            universe = variables()[label].universe
+            self.grids.append((float(universe[0]), float(universe[1] - universe[0]),
+                               float(universe[-1])))
+
+        self.lookup = lru_cache(maxsize=maxsize)(self.compute)
+
+    def quantize(self, mileage, year, body):
+        """
+        Returns:
+            Tuple of the inputs clipped to their universes and rounded to
+            the universe steps.
+        """
+        return tuple(start + round((min(max(x, start), stop) - start) / step) * step
+                     for x, (start, step, stop) in zip((mileage, year, body), self.grids))
+
+    def compute(self, mileage, year, body):
+        return evaluate(mileage, year, body)
+
+    def __call__(self, mileage, year, body):
+        """
+        Returns:
+            float: Value of the car's bucket, NaN if no rule fires
+        """
+        return self.lookup(*self.quantize(*check_inputs(mileage, year, body)))
+
+    def stats(self):
+        """
+        Returns:
+            Dict with hits, misses, hit rate, current and maximum size.
+        """
+        info = self.lookup.cache_info()
+        lookups = info.hits + info.misses
+        return {'hits': info.hits,
+                'misses': info.misses,
+                'hit_rate': info.hits / lookups if lookups else 0.0,
+                'size': info.currsize,
+                'maxsize': info.maxsize}
+
+    def clear(self):
+        """
+        Remove all cached values and reset the statistics.
+        """
+        self.lookup.cache_clear()
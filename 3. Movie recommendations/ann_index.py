@@ -0,0 +1,194 @@
+# https://en.wikipedia.org/wiki/Locality-sensitive_hashing#Random_projection
+
+"""
+Approximate search of similar users with random projection LSH.
+
+Every user's ratings, minus the user's mean rating, are projected on
+n_bits random directions and the signs of the projections make a bucket
+key. Users whose ratings point in a similar direction get the same key
+with high probability. A query only looks at the users in its buckets of
+n_tables independent tables and ranks those candidates with the exact
+score, so it does not touch every user.
+
+The knobs trade recall for speed:
+ * more tables: more candidates, higher recall, slower
+ * more bits:   smaller buckets, fewer candidates, faster, lower recall
+ * probes:      also look in the buckets that differ in 1 bit
+When there are fewer candidates than requested users the query falls back
+to an exact scan.
+
+The buckets hold near users, which is what the euclidean score ranks first,
+so the index is built for that score.
+
+To compare recall and speed of the knobs on the dataset:
+python ann_index.py --tables 4 8 --bits 2 4 --k 5
+
+Usage:
+    index = LSHIndex(RatingStore.from_dataset(data), n_tables=8, n_bits=4)
+    index.top('Damian Eggert', 5)
+"""
+
+import argparse
+import itertools
+import json
+import time
+from collections import defaultdict
+
+import numpy as np
+
+from rating_store import RatingStore, euclidean_score
+from similarity_matrix import top_k
+
+
+class LSHIndex:
+    """
+    Random projection hash tables over the rating vectors of the users.
+    """
+
+    def __init__(self, store, n_tables=8, n_bits=4, probes=False, seed=0):
+        """
+        Parameters:
+            store (RatingStore): Ratings of the users
+            n_tables (int): Independent hash tables
+            n_bits (int): Projections, so bits of a bucket key, per table
+            probes (bool): Also look in the buckets 1 bit away from the query
+            seed (int): Seed of the random projections
+
+        Returns:
+            Self object.
+        """
+        self.store = store
+        self.n_tables = n_tables
+        self.n_bits = n_bits
+        self.probes = probes
+
+        rng = np.random.default_rng(seed)
+        self.planes = rng.standard_normal((len(store.movies), n_tables * n_bits))
+        self.weights = 1 << np.arange(n_bits)
+
+        self.keys = self.hash_users()
+        self.buckets = [defaultdict(list) for _ in range(n_tables)]
+        for user_id, keys in enumerate(self.keys):
+            for table, key in enumerate(keys):
+                self.buckets[table][key].append(user_id)
+
+    def hash_users(self):
+        """
+        Returns:
+            np.ndarray: Bucket key of every user in every table, users x tables
+        """
+        store = self.store
+        counts = np.diff(store.indptr)
+        rows = np.repeat(np.arange(len(store.users)), counts)
+        sums = np.bincount(rows, weights=store.data, minlength=len(store.users))
+        means = sums / np.maximum(counts, 1)
+        centered = store.data - means[rows]
+
+        # Sparse product: projection of every user, only the rated movies count
+        products = centered[:, np.newaxis] * self.planes[store.indices]
+        projections = np.zeros((len(store.users), self.planes.shape[1]))
+        np.add.at(projections, rows, products)
+
+        bits = (projections >= 0).reshape(len(store.users), self.n_tables, self.n_bits)
+        return bits @ self.weights
+
+    def candidates(self, user_id):
+        """
+        Returns:
+            Set of the ids of the users sharing a bucket with the user.
+        """
+        found = set()
+        for table, key in enumerate(self.keys[user_id]):
+            keys = [key]
+            if self.probes:
+                keys += [key ^ (1 << bit) for bit in range(self.n_bits)]
+            for probe in keys:
+                found.update(self.buckets[table].get(probe, ()))
+        found.discard(user_id)
+        return found
+
+    def top(self, user, num_users):
+        """
+        Parameters:
+            user (str): User to compare
+            num_users (int): Number of users
+
+        Returns:
+            List of (user, score) of the highest euclidean scores among the
+            candidates, in decreasing order.
+        """
+        user_id = self.store.user_id(user)
+        others = sorted(self.candidates(user_id))
+
+        if len(others) < num_users:
+            others = [i for i in range(len(self.store.users)) if i != user_id]
+
+        names = [self.store.users[i] for i in others]
+        scores = np.array([euclidean_score(self.store, user, name) for name in names])
+        return [(names[i], float(scores[i])) for i in top_k(scores, num_users)]
+
+    def nearest(self, user, num_users):
+        """
+        The same as top, the euclidean score is already a similarity.
+        """
+        return self.top(user, num_users)
+
+
+def exact_top(store, user, num_users):
+    """
+    Returns:
+        List of (user, score) of the highest euclidean scores of all users.
+    """
+    names = [name for name in store.users if name != user]
+    scores = np.array([euclidean_score(store, user, name) for name in names])
+    return [(names[i], float(scores[i])) for i in top_k(scores, num_users)]
+
+
+def measure(index, k):
+    """
+    Parameters:
+        index (LSHIndex): Index to test
+        k (int): Users per query
+
+    Returns:
+        Tuple of the mean recall against exact_top and the mean query time [s].
+    """
+    recalls = []
+    elapsed = 0.0
+    for user in index.store.users:
+        exact = {name for name, _ in exact_top(index.store, user, k)}
+
+        start = time.perf_counter()
+        found = {name for name, _ in index.top(user, k)}
+        elapsed += time.perf_counter() - start
+
+        recalls.append(len(found & exact) / len(exact) if exact else 1.0)
+    return float(np.mean(recalls)), elapsed / len(index.store.users)
+
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(description='Measure recall and speed of the LSH index')
+    parser.add_argument('--ratings', dest='ratings', default='dane.json',
+                        help='Ratings file, json format')
+    parser.add_argument('--tables', dest='tables', type=int, nargs='+', default=[4, 8],
+                        help='Numbers of hash tables')
+    parser.add_argument('--bits', dest='bits', type=int, nargs='+', default=[2, 4],
+                        help='Bits per bucket key')
+    parser.add_argument('--probes', dest='probes', action='store_true',
+                        help='Also look in the buckets 1 bit away')
+    parser.add_argument('--k', dest='k', type=int, default=5,
+                        help='Users per query')
+    return parser
+
+
+if __name__ == '__main__':
+    args = build_arg_parser().parse_args()
+
+    with open(args.ratings, 'r', encoding='UTF-8') as f:
+        store = RatingStore.from_dataset(json.loads(f.read()))
+
+    print('tables   bits   recall   query [ms]')
+    for n_tables, n_bits in itertools.product(args.tables, args.bits):
+        index = LSHIndex(store, n_tables, n_bits, args.probes)
+        recall, elapsed = measure(index, args.k)
+        print('%6d %6d %8.2f %12.3f' % (n_tables, n_bits, recall, elapsed * 1000))
@@ -2,52 +2,166 @@
 # Author: Adrian Paczewski s14973
 
 import argparse
+import csv
 import json
-import imdb
-import numpy as np
+from concurrent.futures import ProcessPoolExecutor
 
-from compute_scores import euclidean_score
-from manhattan_score import manhattan_score
+from ann_index import LSHIndex
+from metadata_cache import MetadataCache
+from neighbour_scores import NeighbourScorer
+from rating_store import RatingStore
+from similarity_matrix import METRICS, SimilarityMatrix, fingerprint
 
 
 def build_arg_parser():
     parser = argparse.ArgumentParser(description='Find users who are similar to the input user')
-    parser.add_argument('--user', dest='user', required=True,
-                        help='Input user')
+    users = parser.add_mutually_exclusive_group(required=True)
+    users.add_argument('--user', dest='user',
+                       help='Input user')
+    users.add_argument('--users', dest='users', nargs='+',
+                       help='Batch mode: recommendations for these users')
+    users.add_argument('--all', dest='all', action='store_true',
+                       help='Batch mode: recommendations for every user')
+    parser.add_argument('--output', dest='output', default='recommendations.json',
+                        help='Batch mode: .json or .csv file to write')
+    parser.add_argument('--workers', dest='workers', type=int, default=1,
+                        help='Batch mode: number of processes')
+    parser.add_argument('--metric', dest='metric', choices=METRICS, default='manhattan',
+                        help='Similarity score')
+    parser.add_argument('--similarity', dest='similarity',
+                        help='Matrix file written by similarity_matrix.py, '
+                             'its metric is used instead of --metric')
+    parser.add_argument('--ann', dest='ann', action='store_true',
+                        help='Search similar users with the LSH index, euclidean score only')
+    parser.add_argument('--neighbours', dest='neighbours', type=int, default=16,
+                        help='Similar users whose ratings are weighted by similarity, '
+                             '1 recommends the movies of the most similar user only')
+    parser.add_argument('--cache', dest='cache', default='metadata.sqlite',
+                        help='SQLite file with cached IMDb metadata')
+    parser.add_argument('--ttl', dest='ttl', type=float, default=7,
+                        help='Days after which cached metadata is fetched again')
+    parser.add_argument('--timeout', dest='timeout', type=float, default=10,
+                        help='Seconds to wait for IMDb lookups')
     return parser
 
 
 # Finds users in the dataset that are similar to the input user
-def find_similar_users(dataset, user, num_users):
+def find_similar_users(similarity, user, num_users):
     """
         Find similar users.
             Parameters:
-                dataset (dict): File with data, json format
+                similarity (SimilarityMatrix or LSHIndex): Similar user search
                 user (str): User to compare
                 num_users (int): Number of users
 
             Return:
-                scores (dict): Return similar users
+                scores (list): Return (user, score) of similar users
+
+    """
+    # One row of the precomputed scores or the index candidates, highest first
+    return similarity.top(user, num_users)
 
+
+# Movies the input user has not rated, scored by the most similar users
+def recommend(dataset, similarity, user, num_movies=5, scorer=None, neighbours=16):
     """
-    if user not in dataset:
-        raise TypeError('Cannot find ' + user + ' in the dataset')
+        Recommend movies.
+            Parameters:
+                dataset (dict): File with data, json format
+                similarity (SimilarityMatrix or LSHIndex): Similar user search
+                user (str): User to recommend movies to
+                num_movies (int): Number of movies of each list
+                scorer (NeighbourScorer): Weights the ratings of the nearest
+                                          users, None uses only the most
+                                          similar user
+                neighbours (int): Number of similar users
+
+            Return:
+                movies (tuple): Return recommended and not recommended movies
+
+    """
+    if scorer is not None:
+        # The scorer weights by similarity, manhattan scores are distances
+        return scorer.recommend(user, similarity.nearest(user, neighbours), num_movies)
+
+    similar_users = find_similar_users(similarity, user, neighbours)
+
+    best_match_movies = dataset[similar_users[0][0]]
+    user_movies = dataset[user]
+    diff_dict = {}
+
+    for key in best_match_movies.keys():
+        if key not in user_movies.keys():
+            diff_dict[key] = best_match_movies[key]
+
+    # Sorting dict by values
+    diff_dict = {k: v for k, v in sorted(diff_dict.items(), key=lambda item: item[1], reverse=True)}
+
+    recommended_movies = list(diff_dict.keys())[:num_movies]
+    not_recommended_movies = list(reversed(diff_dict.keys()))[:num_movies]
+    return recommended_movies, not_recommended_movies
+
 
-    # Compute Pearson score between input user
-    # and all the users in the dataset
-    # scores = np.array([[x, euclidean_score(dataset, user,
-    #                                        x)] for x in dataset if x != user])
+# Dataset and similarity of a batch worker process, set once by init_worker
+worker_state = {}
 
-    scores = np.array([[x, manhattan_score(dataset, user,
-                                           x)] for x in dataset if x != user])
 
-    # Sort the scores in decreasing order
-    scores_sorted = np.argsort(scores[:, 1])[::-1]
+def init_worker(dataset, similarity, scorer, neighbours):
+    worker_state.update(dataset=dataset, similarity=similarity, scorer=scorer,
+                        neighbours=neighbours)
 
-    # Extract the top 'num_users' scores
-    top_users = scores_sorted[:num_users]
 
-    return scores[top_users]
+def recommend_in_worker(user):
+    return user, recommend(worker_state['dataset'], worker_state['similarity'], user,
+                           scorer=worker_state['scorer'], neighbours=worker_state['neighbours'])
+
+
+def recommend_all(dataset, similarity, users, workers=1, scorer=None, neighbours=16):
+    """
+        Recommend movies to many users, the dataset and similarity are shared.
+            Parameters:
+                dataset (dict): File with data, json format
+                similarity (SimilarityMatrix or LSHIndex): Similar user search
+                users (list): Users to recommend movies to
+                workers (int): Number of processes, 1 runs in this process
+                scorer (NeighbourScorer): Passed to recommend
+                neighbours (int): Passed to recommend
+
+            Return:
+                results (dict): Return user -> recommended and not recommended movies
+
+    """
+    if workers <= 1:
+        pairs = ((user, recommend(dataset, similarity, user, scorer=scorer, neighbours=neighbours))
+                 for user in users)
+    else:
+        # Every process gets the dataset once, not with every user
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                                       initargs=(dataset, similarity, scorer, neighbours))
+        with executor:
+            chunksize = max(1, len(users) // (4 * workers))
+            pairs = list(executor.map(recommend_in_worker, users, chunksize=chunksize))
+
+    return {user: {'recommended': recommended, 'not_recommended': not_recommended}
+            for user, (recommended, not_recommended) in pairs}
+
+
+def write_results(results, path):
+    """
+    Save the result of recommend_all as json, or as csv rows of
+    user, kind, rank, movie if the path ends with .csv.
+    """
+    if path.lower().endswith('.csv'):
+        with open(path, 'w', encoding='UTF-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['user', 'kind', 'rank', 'movie'])
+            for user, lists in results.items():
+                for kind, movies in lists.items():
+                    for rank, movie in enumerate(movies, 1):
+                        writer.writerow([user, kind, rank, movie])
+    else:
+        with open(path, 'w', encoding='UTF-8') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
 
 
 if __name__ == '__main__':
@@ -56,49 +170,69 @@ if __name__ == '__main__':
 
     ratings_file = 'dane.json'
 
-    # Create connection to IMDB API
-    ia = imdb.IMDb()
-
     with open(ratings_file, 'r', encoding="UTF-8") as f:
         data = json.loads(f.read())
-    similar_users = find_similar_users(data, user, 16)
-
-    best_match_movies = data[similar_users[0][0]]
-    user_movies = data[user]
-    diff_dict = {}
-
-    for key in best_match_movies.keys():
-        if key not in user_movies.keys():
-            diff_dict[key] = best_match_movies[key]
 
-    # Sorting dict by values
-    diff_dict = {k: v for k, v in sorted(diff_dict.items(), key=lambda item: item[1], reverse=True)}
+    similarity = None
+    if args.ann:
+        if args.metric != 'euclidean':
+            raise SystemExit('--ann needs --metric euclidean')
+        similarity = LSHIndex(RatingStore.from_dataset(data))
+    elif args.similarity:
+        similarity = SimilarityMatrix.load(args.similarity)
+        if similarity.source != fingerprint(data):
+            print('Ratings changed since ' + args.similarity + ' was saved, recomputing')
+            similarity = SimilarityMatrix.build(data, similarity.metric)
+    if similarity is None:
+        similarity = SimilarityMatrix.build(data, args.metric)
+
+    # One neighbour: the movies of the most similar user, by that user's ratings
+    scorer = NeighbourScorer(data) if args.neighbours > 1 else None
+
+    if user is None:
+        batch_users = list(data) if args.all else args.users
+        for name in batch_users:
+            if name not in data:
+                raise TypeError('Cannot find ' + name + ' in the dataset')
+
+        results = recommend_all(data, similarity, batch_users, args.workers,
+                                scorer, args.neighbours)
+        write_results(results, args.output)
+        print('Saved recommendations for', len(results), 'users to', args.output)
+        raise SystemExit
+
+    recommended_movies, not_recommended_movies = recommend(data, similarity, user,
+                                                           scorer=scorer,
+                                                           neighbours=args.neighbours)
+
+    # IMDb is only asked about titles missing from the local cache
+    metadata = MetadataCache(args.cache, args.ttl * 24 * 3600)
 
     print("\nResults for user " + user)
-    recommended_movies = list(diff_dict.keys())[:5]
     print('\nRecommended movies : ')
+    # All titles are looked up in parallel
+    recommended_metadata = metadata.get_many(recommended_movies, timeout=args.timeout)
     for i in recommended_movies:
         print('* ' + i)
-        movies = ia.search_movie(i)
-        movie = ia.get_movie(movies[0].movieID)
+        movie = recommended_metadata[i]
+        if movie is None:
+            print(' - no data')
+            continue
         print(' - year: ' + str(movie['year']))
         print(' - rating: ' + str(movie['rating']))
         print(' - votes: ' + str(movie['votes']))
 
-        box_office = ''
-        if 'box office' in movie:
-            box_office = movie['box office']['Budget']
-        else:
+        box_office = movie['box_office']
+        if box_office is None:
             box_office = ' no data '
         print(' - box office: ' + box_office)
 
-        if 'director' in movie:
+        if movie['directors']:
             for director in movie['directors']:
-                print(' - director: ' + director['name'])
+                print(' - director: ' + director)
         else:
             print(' - director: no data')
 
-    not_recommended_movies = list(reversed(diff_dict.keys()))[:5]
     print('\nNot recommended movies : ')
     for j in not_recommended_movies:
         print(' - ' + j)
@@ -0,0 +1,229 @@
+# https://docs.python.org/3/library/sqlite3.html
+# https://imdbpy.readthedocs.io/en/latest/usage/quickstart.html
+# https://docs.python.org/3/library/threading.html#thread-objects
+
+"""
+Movie metadata (year, rating, votes, box office, directors) cached on disk.
+
+Every title is looked up once with the fetcher and the result is kept in
+an SQLite file, so repeat queries do not touch the network until the entry
+is older than the TTL. Titles the fetcher cannot find are cached too.
+
+get_many looks up the missing titles of a list in parallel threads, so a
+query waits for the slowest lookup instead of the sum of all of them.
+Lookups that fail or time out give None and are not cached. The threads
+are daemon threads, so a lookup that hangs after the timeout does not keep
+the process from exiting.
+
+The fetcher is any callable title -> dict of FIELDS (or None if the title
+is not found), so tests can use a local stub instead of IMDb:
+
+    cache = MetadataCache('metadata.sqlite', fetcher=lambda title: {'year': 1994})
+    cache('Forrest Gump')
+"""
+
+import json
+import queue
+import sqlite3
+import threading
+import time
+
+FIELDS = ('year', 'rating', 'votes', 'box_office', 'directors')
+
+
+class IMDbFetcher:
+    """
+    Looks titles up on IMDb, the connection is opened on the first call.
+    """
+
+    def __init__(self):
+        self.ia = None
+        self.lock = threading.Lock()
+
+    def __call__(self, title):
+        """
+        Parameters:
+            title (str): Movie title
+
+        Returns:
+            Dict of FIELDS of the first search result, None if nothing is found.
+        """
+        # get_many calls the fetcher from several threads
+        with self.lock:
+            if self.ia is None:
+                import imdb
+                self.ia = imdb.IMDb()
+
+        movies = self.ia.search_movie(title)
+        if not movies:
+            return None
+        movie = self.ia.get_movie(movies[0].movieID)
+
+        box_office = movie['box office'].get('Budget') if 'box office' in movie else None
+        return {'year': movie.get('year'),
+                'rating': movie.get('rating'),
+                'votes': movie.get('votes'),
+                'box_office': box_office,
+                'directors': [director['name'] for director in movie.get('directors', [])]}
+
+
+class MetadataCache:
+    """
+    SQLite cache in front of a metadata fetcher.
+    """
+
+    def __init__(self, path='metadata.sqlite', ttl=7 * 24 * 3600, fetcher=None, clock=time.time):
+        """
+        Parameters:
+            path (str): SQLite file, ':memory:' keeps the cache in memory
+            ttl (float): Seconds after which an entry is fetched again,
+                         None to keep entries forever
+            fetcher (callable): Title -> dict of FIELDS or None, IMDb by default
+            clock (callable): Current time in seconds
+
+        Returns:
+            Self object.
+        """
+        self.connection = sqlite3.connect(path)
+        self.connection.execute('CREATE TABLE IF NOT EXISTS metadata ('
+                                'title TEXT PRIMARY KEY, data TEXT, fetched_at REAL NOT NULL)')
+        self.ttl = ttl
+        self.fetcher = fetcher if fetcher is not None else IMDbFetcher()
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.failures = 0
+
+    def cached(self, title):
+        """
+        Returns:
+            Tuple (found, metadata) of a fresh cache entry, metadata is None
+            for titles the fetcher did not find.
+        """
+        row = self.connection.execute('SELECT data, fetched_at FROM metadata WHERE title = ?',
+                                      (title,)).fetchone()
+        if row is None or (self.ttl is not None and self.clock() - row[1] > self.ttl):
+            return False, None
+        return True, None if row[0] is None else json.loads(row[0])
+
+    def store(self, title, metadata):
+        """
+        Save the metadata of a title, None if it was not found.
+
+        Returns:
+            The metadata as it is read back from the cache.
+        """
+        if metadata is not None:
+            metadata = {field: metadata.get(field) for field in FIELDS}
+        data = None if metadata is None else json.dumps(metadata)
+        with self.connection:
+            self.connection.execute('INSERT OR REPLACE INTO metadata VALUES (?, ?, ?)',
+                                    (title, data, self.clock()))
+        return None if data is None else json.loads(data)
+
+    def get(self, title):
+        """
+        Parameters:
+            title (str): Movie title
+
+        Returns:
+            Dict of FIELDS, None if the fetcher does not know the title.
+        """
+        found, metadata = self.cached(title)
+        if found:
+            self.hits += 1
+            return metadata
+
+        self.misses += 1
+        return self.store(title, self.fetcher(title))
+
+    def __call__(self, title):
+        return self.get(title)
+
+    def get_many(self, titles, max_workers=5, timeout=10.0):
+        """
+        Parameters:
+            titles (list): Movie titles
+            max_workers (int): Lookups running at the same time
+            timeout (float): Seconds to wait for the lookups, counted from the
+                             start, so with max_workers >= titles it is the
+                             timeout of every single lookup
+
+        Returns:
+            Dict title -> dict of FIELDS, None if the title is not found or
+            its lookup failed.
+        """
+        results = {}
+        missing = []
+        for title in dict.fromkeys(titles):
+            found, metadata = self.cached(title)
+            if found:
+                self.hits += 1
+                results[title] = metadata
+            else:
+                missing.append(title)
+
+        if not missing:
+            return results
+
+        pending = queue.Queue()
+        for title in missing:
+            pending.put(title)
+        fetched = {}
+        finished = threading.Condition()
+        stopped = threading.Event()
+
+        def work():
+            # Threads only run the fetcher, the connection is used by this thread only
+            while not stopped.is_set():
+                try:
+                    title = pending.get_nowait()
+                except queue.Empty:
+                    return
+                try:
+                    result = (True, self.fetcher(title))
+                except Exception:
+                    result = (False, None)
+                with finished:
+                    fetched[title] = result
+                    finished.notify()
+
+        # Daemon threads: a hung lookup must not block the interpreter exit,
+        # which ThreadPoolExecutor workers do
+        for _ in range(min(max_workers, len(missing))):
+            threading.Thread(target=work, daemon=True).start()
+
+        with finished:
+            finished.wait_for(lambda: len(fetched) == len(missing), timeout=timeout)
+            stopped.set()
+            fetched = dict(fetched)
+
+        for title in missing:
+            self.misses += 1
+            ok, metadata = fetched.get(title, (False, None))
+            if ok:
+                results[title] = self.store(title, metadata)
+            else:
+                self.failures += 1
+                results[title] = None
+
+        return results
+
+    def clear(self):
+        """
+        Remove all entries.
+        """
+        with self.connection:
+            self.connection.execute('DELETE FROM metadata')
+
+    def stats(self):
+        """
+        Returns:
+            Dict with the hits, misses, failed lookups and number of entries of
+            the cache.
+        """
+        size = self.connection.execute('SELECT COUNT(*) FROM metadata').fetchone()[0]
+        return {'hits': self.hits, 'misses': self.misses, 'failures': self.failures, 'size': size}
+
+    def close(self):
+        self.connection.close()
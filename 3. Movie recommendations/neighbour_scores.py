@@ -0,0 +1,112 @@
+# https://en.wikipedia.org/wiki/Collaborative_filtering#Memory-based
+# https://numpy.org/doc/stable/reference/generated/numpy.matmul.html
+# https://en.wikipedia.org/wiki/Additive_smoothing
+
+"""
+Movie scores from the ratings of the k most similar users.
+
+The predicted rating of a movie is the average of the neighbours' ratings
+of it, weighted by their similarity to the user and shrunk towards the
+neighbours' mean rating:
+
+    score = (s @ R[neighbours] + λ m) / (s @ W[neighbours] + λ)
+
+where s are the similarity scores (higher is closer, see
+SimilarityMatrix.nearest), R the user x movie ratings, W marks the rated
+cells (both only read for the neighbours, from the sparse RatingStore), m is the weighted mean rating of the neighbours and λ the weight of
+`shrinkage` average neighbours. Only neighbours who rated a movie count
+for it, and a movie rated by one weak neighbour stays close to m instead of
+taking that neighbour's rating. Movies with the same score are ordered by
+their support s @ W[neighbours], the similarity of the neighbours who
+rated them.
+
+Usage:
+    scorer = NeighbourScorer(data)
+    scorer.recommend('Damian Eggert', similarity.nearest('Damian Eggert', 16))
+"""
+
+import numpy as np
+
+from rating_store import RatingStore
+
+
+class NeighbourScorer:
+    """
+    Similarity weighted ratings of the neighbours of a user.
+    """
+
+    def __init__(self, dataset, shrinkage=2.0):
+        """
+        Parameters:
+            dataset (dict): User -> movie -> rating
+            shrinkage (float): Number of average neighbours added to every
+                               movie with the neighbours' mean rating, 0 for
+                               the plain weighted average
+
+        Returns:
+            Self object.
+        """
+        self.store = RatingStore.from_dataset(dataset)
+        self.users = self.store.users
+        self.movies = self.store.movies
+        self.index = self.store.user_ids
+        self.shrinkage = shrinkage
+
+    def predict(self, user, neighbours):
+        """
+        Parameters:
+            user (str): User to score movies for
+            neighbours (list): (user, similarity) of the neighbours, higher
+                               similarity is closer
+
+        Returns:
+            Tuple of the predicted rating of every movie (NaN for movies the
+            user rated or no neighbour rated) and the support of every movie,
+            the total similarity of the neighbours who rated it.
+        """
+        if user not in self.index:
+            raise TypeError('Cannot find ' + user + ' in the dataset')
+
+        rows = np.array([self.index[name] for name, _ in neighbours], dtype=int)
+        weights = np.array([score for _, score in neighbours], dtype=float)
+        # Without any positive score every neighbour counts the same
+        if not (weights > 0).any():
+            weights = np.ones(len(rows))
+        weights = np.maximum(weights, 0.0)
+
+        # weights @ R[rows] and weights @ W[rows] from the neighbours' sparse rows
+        movies = [self.store.ratings(row) for row in rows]
+        indices = np.concatenate([ids for ids, _ in movies] + [np.empty(0, dtype=int)])
+        ratings = np.concatenate([values for _, values in movies] + [np.empty(0)])
+        row_weights = np.repeat(weights, [len(ids) for ids, _ in movies])
+        total = np.bincount(indices, weights=row_weights * ratings, minlength=len(self.movies))
+        support = np.bincount(indices, weights=row_weights, minlength=len(self.movies))
+
+        # Weight of `shrinkage` average neighbours at the neighbours' mean rating
+        prior = self.shrinkage * weights.sum() / max(len(rows), 1)
+        mean = total.sum() / support.sum() if support.sum() > 0 else 0.0
+
+        unseen = support > 0
+        unseen[self.store.ratings(self.index[user])[0]] = False
+        with np.errstate(divide='ignore', invalid='ignore'):
+            predicted = np.where(unseen, (total + prior * mean) / (support + prior), np.nan)
+        return predicted, support
+
+    def recommend(self, user, neighbours, num_movies=5):
+        """
+        Returns:
+            Tuple of the movies with the highest and with the lowest predicted
+            ratings, num_movies of each. Equal scores go to the movie with
+            more support first, then in title order.
+        """
+        predicted, support = self.predict(user, neighbours)
+        movies = np.flatnonzero(~np.isnan(predicted))
+
+        # Highest first, then best supported, then title
+        movies = movies[np.lexsort((movies, -support[movies], -predicted[movies]))]
+        recommended = [self.movies[j] for j in movies[:num_movies]]
+
+        # Lowest first, then best supported, then title
+        movies = movies[np.lexsort((movies, -support[movies], predicted[movies]))]
+        not_recommended = [self.movies[j] for j in movies[:num_movies]]
+        return recommended, not_recommended
@@ -0,0 +1,205 @@
+# https://en.wikipedia.org/wiki/Sparse_matrix#Compressed_sparse_row_(CSR,_CRS_or_Yale_format)
+# https://numpy.org/doc/stable/reference/generated/numpy.searchsorted.html
+
+"""
+Ratings stored as a compressed sparse row (CSR) matrix.
+
+Users and movies get integer ids. All ratings live in three flat arrays:
+    indptr[u]:indptr[u + 1]   range of the ratings of user u
+    indices                   movie ids, sorted within every user
+    data                      the ratings
+so memory grows with the number of ratings and there is no dict per user.
+
+The common movies of two users are found by binary search of the shorter
+sorted id list in the longer one, and the scores are computed on the
+matched rating arrays. They give the same results as euclidean_score and
+manhattan_score on the json dataset.
+
+Usage:
+    store = RatingStore.from_dataset(data)
+    manhattan_score(store, 'Damian Eggert', 'Adrian Paczewski')
+"""
+
+import numpy as np
+
+
+class RatingStore:
+    """
+    Sparse user x movie rating matrix.
+    """
+
+    def __init__(self, users, movies, indptr, indices, data):
+        """
+        Parameters:
+            users (list): User names, position is the user id
+            movies (list): Movie titles, position is the movie id
+            indptr (np.ndarray): Start of the ratings of every user, plus the end
+            indices (np.ndarray): Movie ids, sorted within every user
+            data (np.ndarray): Ratings
+
+        Returns:
+            Self object.
+        """
+        self.users = list(users)
+        self.movies = list(movies)
+        self.user_ids = {user: i for i, user in enumerate(self.users)}
+        self.movie_ids = {movie: j for j, movie in enumerate(self.movies)}
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int32)
+        self.data = np.asarray(data, dtype=float)
+
+    @classmethod
+    def from_dataset(cls, dataset):
+        """
+        Parameters:
+            dataset (dict): User -> movie -> rating
+
+        Returns:
+            RatingStore.
+        """
+        users = list(dataset)
+        movies = sorted({movie for ratings in dataset.values() for movie in ratings})
+        movie_ids = {movie: j for j, movie in enumerate(movies)}
+
+        indptr = np.zeros(len(users) + 1, dtype=np.int64)
+        indices = np.empty(sum(len(ratings) for ratings in dataset.values()), dtype=np.int32)
+        data = np.empty(len(indices))
+
+        for i, user in enumerate(users):
+            start = indptr[i]
+            end = start + len(dataset[user])
+            ids = np.fromiter((movie_ids[movie] for movie in dataset[user]), dtype=np.int32,
+                              count=len(dataset[user]))
+            ratings = np.fromiter(dataset[user].values(), dtype=float, count=len(dataset[user]))
+            order = np.argsort(ids)
+            indices[start:end] = ids[order]
+            data[start:end] = ratings[order]
+            indptr[i + 1] = end
+
+        return cls(users, movies, indptr, indices, data)
+
+    def user_id(self, user):
+        """
+        Returns:
+            int: Id of the user
+        """
+        if user not in self.user_ids:
+            raise TypeError('Cannot find ' + user + ' in the dataset')
+        return self.user_ids[user]
+
+    def ratings(self, user_id):
+        """
+        Returns:
+            Tuple of the sorted movie ids and the ratings of a user.
+        """
+        start, end = self.indptr[user_id], self.indptr[user_id + 1]
+        return self.indices[start:end], self.data[start:end]
+
+    def common(self, user1, user2):
+        """
+        Parameters:
+            user1 (str): User to compare
+            user2 (str): User to compare
+
+        Returns:
+            Tuple of the ratings of user1 and of user2 for the movies rated by
+            both, in movie id order.
+        """
+        ids1, ratings1 = self.ratings(self.user_id(user1))
+        ids2, ratings2 = self.ratings(self.user_id(user2))
+
+        # Search the shorter list in the longer one
+        swapped = len(ids1) > len(ids2)
+        if swapped:
+            ids1, ratings1, ids2, ratings2 = ids2, ratings2, ids1, ratings1
+
+        positions = np.searchsorted(ids2, ids1)
+        positions[positions == len(ids2)] = 0
+        found = ids2[positions] == ids1 if len(ids2) else np.zeros(len(ids1), dtype=bool)
+        common1, common2 = ratings1[found], ratings2[positions[found]]
+
+        return (common2, common1) if swapped else (common1, common2)
+
+    def by_movie(self):
+        """
+        The same ratings in compressed sparse column order.
+
+        Returns:
+            Tuple of the start of the raters of every movie plus the end, the
+            user ids (sorted within every movie) and the ratings.
+        """
+        order = np.argsort(self.indices, kind='stable')
+        indptr = np.zeros(len(self.movies) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.indices, minlength=len(self.movies)), out=indptr[1:])
+        rows = np.repeat(np.arange(len(self.users)), np.diff(self.indptr))
+        return indptr, rows[order], self.data[order]
+
+    def dense(self):
+        """
+        Returns:
+            Tuple of the user x movie ratings (0 where not rated) and the mask
+            of rated cells.
+        """
+        rows = np.repeat(np.arange(len(self.users)), np.diff(self.indptr))
+        ratings = np.zeros((len(self.users), len(self.movies)))
+        rated = np.zeros((len(self.users), len(self.movies)), dtype=bool)
+        ratings[rows, self.indices] = self.data
+        rated[rows, self.indices] = True
+        return ratings, rated
+
+    def save(self, path):
+        """
+        Save the store to a .npz file.
+        """
+        np.savez(path, users=np.array(self.users), movies=np.array(self.movies),
+                 indptr=self.indptr, indices=self.indices, data=self.data)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load a store saved with save.
+        """
+        with np.load(path) as data:
+            return cls(data['users'].tolist(), data['movies'].tolist(),
+                       data['indptr'], data['indices'], data['data'])
+
+
+def euclidean_score(store, user1, user2):
+    """
+            Parameters:
+                store (RatingStore): Ratings
+                user1 (str): User to compare
+                user2 (str): User to compare
+
+            Return:
+                result (float): Return calculated distance
+    """
+    ratings1, ratings2 = store.common(user1, user2)
+
+    # If there are no common movies between the users,
+    # then the score is 0
+    if len(ratings1) == 0:
+        return 0
+
+    diff = ratings1 - ratings2
+    return 1 / (1 + np.sqrt(np.dot(diff, diff)))
+
+
+def manhattan_score(store, user1, user2):
+    """
+            Parameters:
+                store (RatingStore): Ratings
+                user1 (str): User to compare
+                user2 (str): User to compare
+
+            Return:
+                result (float): Return calculated distance
+    """
+    ratings1, ratings2 = store.common(user1, user2)
+
+    # If there are no common movies between the users,
+    # then the score is 0
+    if len(ratings1) == 0:
+        return 0
+
+    return np.abs(ratings1 - ratings2).sum()
@@ -0,0 +1,329 @@
+# https://en.wikipedia.org/wiki/Collaborative_filtering
+# https://numpy.org/doc/stable/user/basics.broadcasting.html
+# https://numpy.org/doc/stable/reference/generated/numpy.argpartition.html
+
+"""
+Similarity of every pair of users, computed once for the whole dataset.
+
+The sums over the movies rated by both users (number of common movies,
+sum of absolute and of squared rating differences) are accumulated movie
+by movie from the column order of the sparse RatingStore: every movie adds
+to the pairs of its raters only, so the work grows with the rated pairs and
+no user x movie matrix is built. The scores are the same as those of
+euclidean_score and manhattan_score, including 0 for users without common
+movies.
+
+To save the matrix so a query is only a row lookup:
+python similarity_matrix.py --metric manhattan --output similarity_manhattan.npz
+
+New ratings update only the pairs of their user, the rest stays as saved:
+python similarity_matrix.py --output similarity_manhattan.npz --update "Damian Eggert" "Thor" 7
+
+The manhattan score is a distance, top returns the highest ones as the
+original script did. nearest ranks users by 1 / (1 + distance) instead, a
+similarity that can weight the neighbours' ratings.
+
+Usage:
+    matrix = SimilarityMatrix.load('similarity_manhattan.npz')
+    matrix.top('Damian Eggert', 16)
+    matrix.nearest('Damian Eggert', 16)
+"""
+
+import argparse
+import hashlib
+import json
+
+import numpy as np
+
+from rating_store import RatingStore
+
+METRICS = ('manhattan', 'euclidean')
+
+
+def fingerprint(dataset):
+    """
+    Returns:
+        str: Hash of the ratings, changes whenever any rating changes
+    """
+    text = json.dumps(dataset, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(text.encode('UTF-8')).hexdigest()
+
+
+def pair_sums(store):
+    """
+    Parameters:
+        store (RatingStore): Ratings
+
+    Returns:
+        Tuple of user x user matrices: number of common movies, sum of absolute
+        and sum of squared rating differences over the common movies.
+    """
+    n = len(store.users)
+    common = np.zeros((n, n))
+    absolute = np.zeros((n, n))
+    squared = np.zeros((n, n))
+
+    indptr, raters, ratings = store.by_movie()
+    for start, end in zip(indptr[:-1], indptr[1:]):
+        users = raters[start:end]
+        diff = ratings[start:end, np.newaxis] - ratings[np.newaxis, start:end]
+        pairs = np.ix_(users, users)
+        common[pairs] += 1
+        absolute[pairs] += np.abs(diff)
+        squared[pairs] += diff * diff
+
+    return common, absolute, squared
+
+
+def top_k(scores, k):
+    """
+    Indices of the k highest scores in decreasing order, O(n) selection with
+    np.argpartition instead of sorting all scores.
+
+    Equal scores are taken in index order, the same as a stable sort.
+    """
+    scores = np.asarray(scores)
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=int)
+
+    # k-th highest score: everything above it is in, ties fill up in index order
+    threshold = scores[np.argpartition(-scores, k - 1)[k - 1]]
+    above = np.flatnonzero(scores > threshold)
+    ties = np.flatnonzero(scores == threshold)[:k - len(above)]
+    chosen = np.concatenate([above, ties])
+
+    return chosen[np.lexsort((chosen, -scores[chosen]))]
+
+
+def scores_from_sums(metric, common, absolute, squared):
+    """
+    Returns:
+        np.ndarray: User x user scores of the metric, 0 without common movies
+    """
+    if metric == 'manhattan':
+        scores = absolute
+    elif metric == 'euclidean':
+        scores = 1 / (1 + np.sqrt(squared))
+    else:
+        raise ValueError('Unknown metric ' + metric)
+    return np.where(common > 0, scores, 0.0)
+
+
+def similarities_from_sums(metric, common, absolute, squared):
+    """
+    Returns:
+        np.ndarray: 1 / (1 + distance) of the metric, higher is closer, 0
+                    without common movies
+    """
+    if metric == 'manhattan':
+        distances = absolute
+    elif metric == 'euclidean':
+        distances = np.sqrt(squared)
+    else:
+        raise ValueError('Unknown metric ' + metric)
+    return np.where(common > 0, 1 / (1 + distances), 0.0)
+
+
+class SimilarityMatrix:
+    """
+    Scores of one metric between every pair of users.
+
+    The sums the scores come from are kept too, so a new or changed rating
+    only updates the row and column of its user (see update).
+    """
+
+    def __init__(self, users, sums, metric, dataset, source=None):
+        """
+        Parameters:
+            users (list): User names, order of the rows and columns
+            sums (tuple): Result of pair_sums for the users
+            metric (str): 'manhattan' or 'euclidean'
+            dataset (dict): User -> movie -> rating the sums come from
+            source (str): Fingerprint of the dataset, computed if not given
+
+        Returns:
+            Self object.
+        """
+        self.users = list(users)
+        self.index = {user: i for i, user in enumerate(self.users)}
+        self.common, self.absolute, self.squared = [np.array(m, dtype=float) for m in sums]
+        self.metric = metric
+        self.scores = scores_from_sums(metric, self.common, self.absolute, self.squared)
+
+        self.dataset = {user: dict(ratings) for user, ratings in dataset.items()}
+        # movie -> user index -> rating, the users an update has to touch
+        self.raters = {}
+        for user, ratings in self.dataset.items():
+            for movie, rating in ratings.items():
+                self.raters.setdefault(movie, {})[self.index[user]] = rating
+        self.source = source if source is not None else fingerprint(self.dataset)
+
+    @classmethod
+    def build(cls, dataset, metric='manhattan'):
+        """
+        Parameters:
+            dataset (dict): User -> movie -> rating
+            metric (str): 'manhattan' or 'euclidean'
+
+        Returns:
+            SimilarityMatrix.
+        """
+        store = RatingStore.from_dataset(dataset)
+        return cls(store.users, pair_sums(store), metric, dataset)
+
+    def add_user(self, user):
+        """
+        Add a user without ratings, all of its scores are 0.
+
+        Returns:
+            int: Index of the user
+        """
+        i = len(self.users)
+        self.users.append(user)
+        self.index[user] = i
+        self.dataset[user] = {}
+        self.common, self.absolute, self.squared, self.scores = [
+            np.pad(m, ((0, 1), (0, 1))) for m in (self.common, self.absolute, self.squared, self.scores)]
+        return i
+
+    def update(self, user, movie, rating):
+        """
+        Add or change one rating. Only the pairs of the user with the other
+        users who rated the movie change, so only those sums are updated and
+        only the row and column of the user are scored again.
+
+        Parameters:
+            user (str): User who rated the movie, added if new
+            movie (str): Rated movie
+            rating (float): New rating
+        """
+        i = self.index[user] if user in self.index else self.add_user(user)
+        raters = self.raters.setdefault(movie, {})
+        old = raters.get(i)
+
+        others = np.array([j for j in raters if j != i], dtype=int)
+        values = np.array([raters[j] for j in others], dtype=float)
+
+        absolute = np.abs(rating - values)
+        squared = (rating - values) ** 2
+        if old is None:
+            common = np.ones(len(others))
+            self.common[i, i] += 1
+        else:
+            common = np.zeros(len(others))
+            absolute -= np.abs(old - values)
+            squared -= (old - values) ** 2
+
+        for sums, delta in ((self.common, common), (self.absolute, absolute),
+                            (self.squared, squared)):
+            sums[i, others] += delta
+            sums[others, i] += delta
+
+        raters[i] = rating
+        self.dataset[user][movie] = rating
+        self.source = None
+
+        row = scores_from_sums(self.metric, self.common[i], self.absolute[i], self.squared[i])
+        self.scores[i, :] = row
+        self.scores[:, i] = row
+
+    def row(self, user):
+        """
+        Returns:
+            np.ndarray: Scores between the user and every user
+        """
+        if user not in self.index:
+            raise TypeError('Cannot find ' + user + ' in the dataset')
+        return self.scores[self.index[user]]
+
+    def top(self, user, num_users):
+        """
+        Parameters:
+            user (str): User to compare
+            num_users (int): Number of users
+
+        Returns:
+            List of (user, score) of the highest scores, in decreasing order.
+        """
+        return self.highest(user, self.row(user), num_users)
+
+    def nearest(self, user, num_users):
+        """
+        Parameters:
+            user (str): User to compare
+            num_users (int): Number of users
+
+        Returns:
+            List of (user, similarity) of the closest users, in decreasing
+            similarity, see similarities_from_sums. The same as top for the
+            euclidean score.
+        """
+        self.row(user)
+        i = self.index[user]
+        row = similarities_from_sums(self.metric, self.common[i], self.absolute[i], self.squared[i])
+        return self.highest(user, row, num_users)
+
+    def highest(self, user, row, num_users):
+        """
+        Returns:
+            List of (user, value) of the highest values of a row, without the
+            user, in decreasing order.
+        """
+        others = np.delete(np.arange(len(self.users)), self.index[user])
+        return [(self.users[i], float(row[i])) for i in others[top_k(row[others], num_users)]]
+
+    def save(self, path):
+        """
+        Save the matrix to a .npz file.
+        """
+        if self.source is None:
+            self.source = fingerprint(self.dataset)
+        np.savez(path, users=np.array(self.users), common=self.common, absolute=self.absolute,
+                 squared=self.squared, metric=self.metric, source=self.source,
+                 dataset=json.dumps(self.dataset, ensure_ascii=False))
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load a matrix saved with save.
+        """
+        with np.load(path) as data:
+            return cls(data['users'].tolist(), (data['common'], data['absolute'], data['squared']),
+                       str(data['metric']), json.loads(str(data['dataset'])), str(data['source']))
+
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(description='Compute the similarity of all pairs of users')
+    parser.add_argument('--ratings', dest='ratings', default='dane.json',
+                        help='Ratings file, json format')
+    parser.add_argument('--metric', dest='metric', choices=METRICS, default='manhattan',
+                        help='Similarity score')
+    parser.add_argument('--output', dest='output', required=True,
+                        help='Matrix file to write')
+    parser.add_argument('--update', dest='update', nargs=3, action='append',
+                        metavar=('USER', 'MOVIE', 'RATING'),
+                        help='Apply a new rating to the saved --output matrix '
+                             'instead of computing it again, can be repeated')
+    return parser
+
+
+if __name__ == '__main__':
+    args = build_arg_parser().parse_args()
+
+    if args.update:
+        matrix = SimilarityMatrix.load(args.output)
+        for user, movie, rating in args.update:
+            # Whole ratings stay ints, the same as in the json file
+            rating = float(rating)
+            matrix.update(user, movie, int(rating) if rating.is_integer() else rating)
+        matrix.save(args.output)
+        print('Applied', len(args.update), 'ratings to', args.output)
+        raise SystemExit
+
+    with open(args.ratings, 'r', encoding='UTF-8') as f:
+        data = json.loads(f.read())
+
+    matrix = SimilarityMatrix.build(data, args.metric)
+    matrix.save(args.output)
+    print('Saved', len(matrix.users), 'x', len(matrix.users), args.metric, 'scores to', args.output)
@@ -0,0 +1,191 @@
+# https://numpy.org/doc/stable/reference/generated/numpy.loadtxt.html
+# https://numpy.org/doc/stable/reference/generated/numpy.lib.format.open_memmap.html
+
+"""
+Definitions of the SVM datasets: file, column order, target and the example
+sample used by the scripts. Loading only needs NumPy.
+
+The first load of a csv file converts it to one float64 .npy file per
+column in column_cache/, later loads memory map those files instead of
+parsing text. The cache is rebuilt when the csv file changes: a different
+size or modification time, confirmed by its hash. The csv file is parsed
+in chunks of rows and the columns are written straight to the mapped
+files, so neither the conversion nor iter_chunks needs the whole file in
+memory.
+"""
+
+import hashlib
+import itertools
+import json
+import os
+
+import numpy as np
+
+# Research: Predicting the quality of white wines on a scale given chemical measures of each wine
+WINE = {
+    'path': 'winequality-white.csv',
+    'delimiter': ';',
+    'features': ["fixed acidity", "volatile acidity", "citric acid", "residual sugar", "chlorides",
+                 "free sulfur dioxide", "total sulfur dioxide", "density", "pH", "sulphates",
+                 "alcohol"],
+    'target': 'quality',
+    'unit': '',
+    'example': [6.2, 0.45, 0.26, 4.4, 0.063, 63, 206, 0.994, 3.27, 0.52, 9.8],
+}
+
+# Research: Attack range of a player playing in the Polish volleyball league
+ATTACK_RANGE = {
+    'path': 'dane.csv',
+    'delimiter': ',',
+    'features': ['Height', 'Weight', 'Age', 'Training internship'],
+    'target': 'Jump',
+    'unit': 'cm',
+    'example': [199, 90, 18, 1],
+}
+
+DATASETS = {'wine': WINE, 'attack_range': ATTACK_RANGE}
+
+KERNELS = ('linear', 'poly', 'rbf', 'sigmoid')
+
+CACHE_DIR = 'column_cache'
+
+
+def file_hash(path):
+    """
+    Returns:
+        str: SHA-256 of the file content
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def count_rows(path):
+    """
+    Returns:
+        int: Number of non-empty lines of a text file
+    """
+    with open(path, 'rb') as f:
+        return sum(1 for line in f if line.strip())
+
+
+def convert(path, delimiter, cache, chunk_rows=100000):
+    """
+    Write every column of a csv file to its own .npy file.
+
+    Parameters:
+        path (str): Csv file
+        delimiter (str): Column delimiter
+        cache (str): Directory of the .npy files
+        chunk_rows (int): Rows parsed at once
+
+    Returns:
+        int: Number of columns
+    """
+    rows = count_rows(path)
+    os.makedirs(cache, exist_ok=True)
+
+    columns = None
+    start = 0
+    with open(path, 'r', encoding='UTF-8') as f:
+        lines = (line for line in f if line.strip())
+        while True:
+            chunk = list(itertools.islice(lines, chunk_rows))
+            if not chunk:
+                break
+            values = np.loadtxt(chunk, delimiter=delimiter, ndmin=2)
+            if columns is None:
+                columns = [np.lib.format.open_memmap(os.path.join(cache, '%d.npy' % j), mode='w+',
+                                                     dtype=np.float64, shape=(rows,))
+                           for j in range(values.shape[1])]
+            for j, column in enumerate(columns):
+                column[start:start + len(values)] = values[:, j]
+            start += len(values)
+
+    for column in columns or []:
+        column.flush()
+    return len(columns or [])
+
+
+def columns(dataset, path=None, cache_dir=CACHE_DIR):
+    """
+    Parameters:
+        dataset (dict): One of DATASETS
+        path (str): Csv file, the dataset's file by default
+        cache_dir (str): Directory of the column caches
+
+    Returns:
+        List of read-only memory mapped columns of the csv file, converted
+        first if the cache is missing or out of date.
+    """
+    path = path or dataset['path']
+    cache = os.path.join(cache_dir, os.path.basename(path))
+    meta_path = os.path.join(cache, 'meta.json')
+    stat = os.stat(path)
+
+    meta = None
+    if os.path.exists(meta_path):
+        with open(meta_path, 'r', encoding='UTF-8') as f:
+            meta = json.load(f)
+
+    fresh = meta is not None and meta['source'] == os.path.abspath(path)
+    if fresh and (meta['size'], meta['mtime']) != (stat.st_size, stat.st_mtime):
+        # Touched but maybe not changed, the hash decides
+        fresh = meta['hash'] == file_hash(path)
+
+    if not fresh:
+        meta = {'source': os.path.abspath(path), 'hash': file_hash(path),
+                'columns': convert(path, dataset['delimiter'], cache)}
+    if not fresh or (meta['size'], meta['mtime']) != (stat.st_size, stat.st_mtime):
+        meta.update(size=stat.st_size, mtime=stat.st_mtime)
+        with open(meta_path, 'w', encoding='UTF-8') as f:
+            json.dump(meta, f)
+
+    return [np.load(os.path.join(cache, '%d.npy' % j), mmap_mode='r')
+            for j in range(meta['columns'])]
+
+
+def split(dataset, data):
+    """
+    Returns:
+        Tuple of the features and the targets of rows x columns data, whole
+        number targets as ints.
+    """
+    X, y = data[:, :len(dataset['features'])], data[:, len(dataset['features'])]
+    if np.array_equal(y, np.round(y)):
+        y = y.astype(int)
+    return X, y
+
+
+def load(dataset, path=None, cache_dir=CACHE_DIR):
+    """
+    Parameters:
+        dataset (dict): One of DATASETS
+        path (str): Csv file, the dataset's file by default
+        cache_dir (str): Directory of the column caches, None parses the csv
+
+    Returns:
+        Tuple of the features (rows x features) and the targets, whole number
+        targets are returned as ints.
+    """
+    if cache_dir is None:
+        data = np.loadtxt(path or dataset['path'], delimiter=dataset['delimiter'], ndmin=2)
+    else:
+        data = np.column_stack(columns(dataset, path, cache_dir))
+    return split(dataset, data)
+
+
+def iter_chunks(dataset, path=None, chunk_rows=100000, cache_dir=CACHE_DIR):
+    """
+    Read a dataset in chunks of rows from the column cache, for files that do
+    not fit in memory.
+
+    Yields:
+        Tuple of the features and the targets of every chunk.
+    """
+    data = columns(dataset, path, cache_dir)
+    rows = len(data[0]) if data else 0
+    for start in range(0, rows, chunk_rows):
+        yield split(dataset, np.column_stack([column[start:start + chunk_rows] for column in data]))
@@ -0,0 +1,223 @@
+# https://scikit-learn.org/stable/modules/cross_validation.html#k-fold
+# https://scikit-learn.org/stable/modules/grid_search.html
+# https://docs.python.org/3/library/concurrent.futures.html#processpoolexecutor
+
+"""
+Search C and gamma of every kernel with k-fold cross-validation on all cores.
+
+Every (kernel, C, gamma, fold) fit is one job of a process pool. The
+accuracy and fit time of every job are cached in a json file named by the
+hash of the data file, the parameters and the folds, so a second run with
+a bigger grid only fits the new points. gamma does not change the linear
+kernel, so that kernel is only fitted once per C.
+
+The best parameters of every kernel are fitted again on all rows and can
+be saved for predict.py:
+
+    python grid_search.py --dataset wine --C 0.1 1 10 --gamma scale 0.001 0.01 --output models/wine.npz
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import time
+import warnings
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from sklearn import svm
+from sklearn.exceptions import ConvergenceWarning
+from sklearn.model_selection import KFold
+
+import datasets
+import train
+
+# Dataset of a worker process, set once by init_worker
+worker_state = {}
+
+
+def init_worker(X, y):
+    worker_state['X'] = X
+    worker_state['y'] = y
+
+
+def fit_fold(job):
+    """
+    Parameters:
+        job (tuple): Kernel, C, gamma, max iterations, train and test row indices
+
+    Returns:
+        Dict with the test accuracy and the fit time [s].
+    """
+    kernel, C, gamma, max_iter, train_rows, test_rows = job
+    X, y = worker_state['X'], worker_state['y']
+
+    start = time.perf_counter()
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', ConvergenceWarning)
+        model = svm.SVC(kernel=kernel, C=C, gamma=gamma, max_iter=max_iter)
+        model.fit(X[train_rows], y[train_rows])
+    fit_time = time.perf_counter() - start
+
+    return {'accuracy': float((model.predict(X[test_rows]) == y[test_rows]).mean()),
+            'fit_time': fit_time}
+
+
+def cache_key(data_hash, kernel, C, gamma, max_iter, folds, seed, fold):
+    """
+    Returns:
+        str: Name of the cache file of one fold
+    """
+    # 1 and 1.0 are the same point
+    gamma = gamma if isinstance(gamma, str) else float(gamma)
+    text = json.dumps([data_hash, kernel, float(C), gamma, max_iter, folds, seed, fold])
+    return hashlib.sha256(text.encode('UTF-8')).hexdigest()[:32]
+
+
+def parse_gamma(text):
+    return text if text in ('scale', 'auto') else float(text)
+
+
+def grid(kernels, Cs, gammas):
+    """
+    Returns:
+        List of (kernel, C, gamma) to try, gamma is left out for linear.
+    """
+    points = []
+    for kernel in kernels:
+        for C in Cs:
+            for gamma in (['scale'] if kernel == 'linear' else gammas):
+                points.append((kernel, C, gamma))
+    return points
+
+
+def search(X, y, data_hash, points, folds=5, seed=0, workers=None, cache_dir='grid_cache',
+           max_iter=1000000):
+    """
+    Cross-validate every grid point, reusing cached folds.
+
+    Parameters:
+        X (np.ndarray): Samples x features
+        y (np.ndarray): Targets
+        data_hash (str): Hash of the data, part of the cache key
+        points (list): (kernel, C, gamma) to try
+        folds (int): Number of folds
+        seed (int): Seed of the fold split
+        workers (int): Number of processes, all cores by default
+        cache_dir (str): Directory of the cached fold results
+        max_iter (int): Iteration limit of one fit, stops points that do
+                        not converge
+
+    Returns:
+        Dict (kernel, C, gamma) -> mean accuracy, mean fit time and the number
+        of folds computed in this run.
+    """
+    splits = list(KFold(n_splits=folds, shuffle=True, random_state=seed).split(X))
+    os.makedirs(cache_dir, exist_ok=True)
+
+    results = defaultdict(list)
+    jobs = []
+    paths = []
+    for point in points:
+        for fold, (train_rows, test_rows) in enumerate(splits):
+            path = os.path.join(cache_dir, cache_key(data_hash, *point, max_iter, folds, seed, fold)
+                                + '.json')
+            if os.path.exists(path):
+                with open(path, 'r', encoding='UTF-8') as f:
+                    results[point].append(json.load(f))
+            else:
+                jobs.append(point + (max_iter, train_rows, test_rows))
+                paths.append((point, path))
+
+    computed = defaultdict(int)
+    if jobs:
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                                 initargs=(X, y)) as executor:
+            for (point, path), result in zip(paths, executor.map(fit_fold, jobs)):
+                # Written under another name first, a crash leaves no truncated fold
+                with open(path + '.tmp', 'w', encoding='UTF-8') as f:
+                    json.dump(result, f)
+                os.replace(path + '.tmp', path)
+                results[point].append(result)
+                computed[point] += 1
+
+    return {point: {'accuracy': float(np.mean([r['accuracy'] for r in folds_results])),
+                    'fit_time': float(np.mean([r['fit_time'] for r in folds_results])),
+                    'computed': computed[point]}
+            for point, folds_results in results.items()}
+
+
+def best_per_kernel(scores):
+    """
+    Returns:
+        Dict kernel -> (C, gamma, scores) of the highest mean accuracy, ties
+        go to the faster fit.
+    """
+    best = {}
+    for (kernel, C, gamma), score in scores.items():
+        rank = (score['accuracy'], -score['fit_time'])
+        if kernel not in best or rank > best[kernel][0]:
+            best[kernel] = (rank, (C, gamma, score))
+    return {kernel: point for kernel, (_, point) in best.items()}
+
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(description='Search SVM parameters with cross-validation')
+    parser.add_argument('--dataset', dest='dataset', choices=datasets.DATASETS, required=True,
+                        help='Dataset to fit')
+    parser.add_argument('--data', dest='data',
+                        help='Csv file, the dataset\'s file by default')
+    parser.add_argument('--kernels', dest='kernels', nargs='+', choices=datasets.KERNELS,
+                        default=list(datasets.KERNELS), help='Kernels to search')
+    parser.add_argument('--C', dest='C', type=float, nargs='+', default=[0.1, 1.0, 10.0],
+                        help='Values of C')
+    parser.add_argument('--gamma', dest='gamma', type=parse_gamma, nargs='+',
+                        default=['scale', 0.001, 0.01], help='Values of gamma, or scale / auto')
+    parser.add_argument('--folds', dest='folds', type=int, default=5,
+                        help='Number of cross-validation folds')
+    parser.add_argument('--seed', dest='seed', type=int, default=0,
+                        help='Seed of the fold split')
+    parser.add_argument('--max-iter', dest='max_iter', type=int, default=1000000,
+                        help='Iteration limit of one fit')
+    parser.add_argument('--workers', dest='workers', type=int, default=os.cpu_count(),
+                        help='Number of processes')
+    parser.add_argument('--cache-dir', dest='cache_dir', default='grid_cache',
+                        help='Directory of the cached fold results')
+    parser.add_argument('--output', dest='output',
+                        help='Save the best model of every kernel to this file')
+    return parser
+
+
+if __name__ == '__main__':
+    args = build_arg_parser().parse_args()
+    dataset = datasets.DATASETS[args.dataset]
+    path = args.data or dataset['path']
+
+    X, y = datasets.load(dataset, path)
+    data_hash = datasets.file_hash(path)
+    points = grid(args.kernels, args.C, args.gamma)
+
+    start = time.perf_counter()
+    scores = search(X, y, data_hash, points, args.folds, args.seed, args.workers,
+                    args.cache_dir, args.max_iter)
+    computed = sum(score['computed'] for score in scores.values())
+    print('Cross-validated', len(points), 'points,', computed, 'of', len(points) * args.folds,
+          'folds computed in', round(time.perf_counter() - start, 2), 's')
+
+    best = best_per_kernel(scores)
+    # The refit uses the iteration limit of the cross-validated fits
+    params = {kernel: {'C': C, 'gamma': gamma, 'max_iter': args.max_iter}
+              for kernel, (C, gamma, _) in best.items()}
+    models, metadata = train.train(dataset, list(best), path, params)
+
+    print('kernel        C     gamma   accuracy   fit time [s]')
+    for kernel, (C, gamma, score) in best.items():
+        print('%-8s %6g %9s %10.3f %14.4f'
+              % (kernel, C, gamma, score['accuracy'], metadata['fit_times'][kernel]))
+
+    if args.output:
+        metadata['cv_accuracy'] = {kernel: score['accuracy'] for kernel, (_, _, score) in best.items()}
+        train.save_models(args.output, models, metadata)
+        print('Saved', len(models), 'models to', args.output)
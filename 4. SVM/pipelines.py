@@ -0,0 +1,128 @@
+# https://scikit-learn.org/stable/modules/preprocessing.html#standardization-or-mean-removal-and-variance-scaling
+# https://scikit-learn.org/stable/modules/svm.html#complexity
+# https://scikit-learn.org/stable/modules/kernel_approximation.html
+
+"""
+Scaled SVM pipelines and modes that scale to many rows.
+
+The raw wine features differ by orders of magnitude (total sulfur dioxide
+~200, density ~0.99), which makes libsvm converge slowly, so every mode
+but 'svc' standardizes the features first. Kernel SVC needs time between
+quadratic and cubic in the number of rows; the other modes grow linearly:
+
+ * svc:         svm.SVC on the raw features, as in svm_wine.py
+ * scaled:      StandardScaler + svm.SVC
+ * linear_svc:  StandardScaler + LinearSVC, primal solver of the linear kernel
+ * sgd:         StandardScaler + SGDClassifier with the hinge loss (linear SVM)
+ * nystroem:    StandardScaler + Nystroem rbf features + LinearSVC
+ * rbf_sampler: StandardScaler + random Fourier rbf features + LinearSVC
+
+To compare fit time, prediction time and accuracy of the modes:
+python pipelines.py --dataset wine
+"""
+
+import argparse
+import time
+import warnings
+
+from sklearn import svm
+from sklearn.exceptions import ConvergenceWarning
+from sklearn.kernel_approximation import Nystroem, RBFSampler
+from sklearn.linear_model import SGDClassifier
+from sklearn.model_selection import train_test_split
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+
+import datasets
+
+# Modes that take a kernel, the others stand in for the kernel given here
+KERNEL_MODES = ('svc', 'scaled')
+FAST_MODES = {'linear_svc': 'linear', 'sgd': 'linear', 'nystroem': 'rbf', 'rbf_sampler': 'rbf'}
+MODES = KERNEL_MODES + tuple(FAST_MODES)
+
+
+def make_model(mode, kernel='rbf', n_components=100, seed=0):
+    """
+    Parameters:
+        mode (str): One of MODES
+        kernel (str): Kernel of the 'svc' and 'scaled' modes
+        n_components (int): Features of the rbf approximations
+        seed (int): Seed of SGD and of the rbf approximations
+
+    Returns:
+        Unfitted estimator of the mode.
+    """
+    if mode == 'svc':
+        return svm.SVC(kernel=kernel)
+    if mode == 'scaled':
+        return make_pipeline(StandardScaler(), svm.SVC(kernel=kernel))
+    if mode == 'linear_svc':
+        return make_pipeline(StandardScaler(), svm.LinearSVC(dual=False))
+    if mode == 'sgd':
+        return make_pipeline(StandardScaler(), SGDClassifier(loss='hinge', random_state=seed))
+    if mode == 'nystroem':
+        return make_pipeline(StandardScaler(),
+                             Nystroem(kernel='rbf', n_components=n_components, random_state=seed),
+                             svm.LinearSVC(dual=False))
+    if mode == 'rbf_sampler':
+        return make_pipeline(StandardScaler(),
+                             RBFSampler(n_components=n_components, random_state=seed),
+                             svm.LinearSVC(dual=False))
+    raise ValueError('Unknown mode ' + mode)
+
+
+def compare(X, y, modes=MODES, kernels=datasets.KERNELS, test_size=0.25, seed=0):
+    """
+    Fit every mode on the same train split and score it on the test split.
+
+    Returns:
+        List of dicts with the mode, kernel, fit time, prediction time and
+        accuracy.
+    """
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=test_size,
+                                                        random_state=seed)
+    rows = []
+    for mode in modes:
+        for kernel in (kernels if mode in KERNEL_MODES else [FAST_MODES[mode]]):
+            # Nystroem needs at most as many components as rows
+            model = make_model(mode, kernel, min(100, len(X_train)), seed)
+
+            start = time.perf_counter()
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore', ConvergenceWarning)
+                model.fit(X_train, y_train)
+            fit_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            accuracy = (model.predict(X_test) == y_test).mean()
+            predict_time = time.perf_counter() - start
+
+            rows.append({'mode': mode, 'kernel': kernel, 'fit_time': fit_time,
+                         'predict_time': predict_time, 'accuracy': float(accuracy)})
+    return rows
+
+
+def print_comparison(rows):
+    print('mode         kernel    fit [s]   predict [s]   accuracy')
+    for row in rows:
+        print('%-12s %-8s %8.4f %13.4f %10.3f'
+              % (row['mode'], row['kernel'], row['fit_time'], row['predict_time'], row['accuracy']))
+
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(description='Compare SVM pipelines on a dataset')
+    parser.add_argument('--dataset', dest='dataset', choices=datasets.DATASETS, default='wine',
+                        help='Dataset to fit')
+    parser.add_argument('--data', dest='data',
+                        help='Csv file, the dataset\'s file by default')
+    parser.add_argument('--modes', dest='modes', nargs='+', choices=MODES, default=list(MODES),
+                        help='Modes to compare')
+    parser.add_argument('--test-size', dest='test_size', type=float, default=0.25,
+                        help='Part of the rows used to measure the accuracy')
+    return parser
+
+
+if __name__ == '__main__':
+    args = build_arg_parser().parse_args()
+    X, y = datasets.load(datasets.DATASETS[args.dataset], args.data)
+    print_comparison(compare(X, y, args.modes, test_size=args.test_size))
@@ -0,0 +1,314 @@
+# https://www.csie.ntu.edu.tw/~cjlin/papers/libsvm.pdf
+# https://scikit-learn.org/stable/modules/svm.html#multi-class-classification
+
+"""
+Predictions of the models saved by train.py, using only NumPy.
+
+SVC classifies with one-vs-one voting: for every pair of classes (i, j)
+the decision value is
+
+    sum of dual_coef * K(x, support vector) + intercept
+
+over the support vectors of both classes, and a positive value is a vote
+for i, otherwise for j. The class with the most votes wins, ties go to the
+first class, the same as libsvm. The coefficients of all pairs are put in
+one support vectors x pairs matrix, so a batch of samples takes one kernel
+matrix and one matrix product.
+
+The model file is opened on the first prediction and a kernel's arrays are
+read only when that kernel is used:
+
+    python predict.py --model models/wine.npz --kernels rbf --values 6.2 0.45 ...
+
+Many samples are read from a csv or json lines file, or from stdin with
+--input -, and predicted in chunks; the predictions of every chunk are
+written before the next one is read, in the format of the input:
+
+    python predict.py --model models/wine.npz --input winequality-white.csv --delimiter ";"
+    cat samples.jsonl | python predict.py --model models/wine.npz --input - --format jsonl
+"""
+
+import argparse
+import itertools
+import json
+import sys
+
+import numpy as np
+
+
+class KernelModel:
+    """
+    One fitted SVC, enough of it to predict.
+    """
+
+    def __init__(self, kernel, params, support_vectors, dual_coef, intercept, n_support, classes):
+        """
+        Parameters:
+            kernel (str): 'linear', 'poly', 'rbf' or 'sigmoid'
+            params (dict): gamma, coef0 and degree of the kernel
+            support_vectors (np.ndarray): Support vectors, ordered by class
+            dual_coef (np.ndarray): svm.SVC.dual_coef_
+            intercept (np.ndarray): svm.SVC.intercept_, one per pair of classes
+            n_support (np.ndarray): Support vectors of every class
+            classes (np.ndarray): Class labels
+
+        Returns:
+            Self object.
+        """
+        self.kernel = kernel
+        self.gamma = params['gamma']
+        self.coef0 = params['coef0']
+        self.degree = params['degree']
+        self.support_vectors = support_vectors
+        self.classes = classes
+
+        # Coefficient of every support vector in the decision value of every pair
+        n = len(classes)
+        starts = np.concatenate([[0], np.cumsum(n_support)])
+        pairs = [(i, j) for i in range(n) for j in range(i + 1, n)]
+        self.coefficients = np.zeros((len(support_vectors), len(pairs)))
+        for p, (i, j) in enumerate(pairs):
+            self.coefficients[starts[i]:starts[i + 1], p] = dual_coef[j - 1, starts[i]:starts[i + 1]]
+            self.coefficients[starts[j]:starts[j + 1], p] = dual_coef[i, starts[j]:starts[j + 1]]
+        self.intercept = np.array(intercept, dtype=float)
+        # With two classes scikit-learn stores the negated libsvm dual
+        # coefficients and intercept, so a positive value votes for classes[1]
+        if n == 2:
+            self.coefficients = -self.coefficients
+            self.intercept = -self.intercept
+        self.first = np.array([i for i, _ in pairs], dtype=int)
+        self.second = np.array([j for _, j in pairs], dtype=int)
+
+    def kernel_matrix(self, X):
+        """
+        Returns:
+            np.ndarray: Kernel of every sample and support vector
+        """
+        if self.kernel == 'rbf':
+            distances = ((X * X).sum(axis=1)[:, np.newaxis]
+                         + (self.support_vectors ** 2).sum(axis=1)
+                         - 2 * X @ self.support_vectors.T)
+            return np.exp(-self.gamma * np.maximum(distances, 0.0))
+
+        products = X @ self.support_vectors.T
+        if self.kernel == 'linear':
+            return products
+        if self.kernel == 'poly':
+            return (self.gamma * products + self.coef0) ** self.degree
+        if self.kernel == 'sigmoid':
+            return np.tanh(self.gamma * products + self.coef0)
+        raise ValueError('Unknown kernel ' + self.kernel)
+
+    def decision_function(self, X):
+        """
+        Returns:
+            np.ndarray: One-vs-one decision values, samples x pairs of classes
+        """
+        return self.kernel_matrix(X) @ self.coefficients + self.intercept
+
+    def predict(self, X):
+        """
+        Parameters:
+            X (np.ndarray): Samples x features
+
+        Returns:
+            np.ndarray: Predicted class of every sample
+        """
+        X = np.atleast_2d(np.asarray(X, dtype=float))
+        decision = self.decision_function(X)
+        winners = np.where(decision > 0, self.first, self.second)
+
+        votes = np.zeros((len(X), len(self.classes)), dtype=int)
+        np.add.at(votes, (np.arange(len(X))[:, np.newaxis], winners), 1)
+        return self.classes[votes.argmax(axis=1)]
+
+
+class ModelFile:
+    """
+    Lazily loaded model file written by train.py.
+    """
+
+    def __init__(self, path):
+        """
+        Parameters:
+            path (str): .npz model file
+
+        Returns:
+            Self object.
+        """
+        self.path = path
+        self.data = None
+        self._metadata = None
+        self.models = {}
+
+    @property
+    def metadata(self):
+        """
+        Returns:
+            Dict with the features, target, kernels and data hash of the models.
+        """
+        if self.data is None:
+            self.data = np.load(self.path)
+            self._metadata = json.loads(str(self.data['metadata']))
+        return self._metadata
+
+    @property
+    def kernels(self):
+        return list(self.metadata['kernels'])
+
+    def model(self, kernel):
+        """
+        Returns:
+            KernelModel of a kernel, read from the file on the first use.
+        """
+        if kernel not in self.models:
+            if kernel not in self.metadata['kernels']:
+                raise ValueError(self.path + ' has no ' + kernel + ' model')
+            arrays = [self.data[kernel + '.' + name] for name in
+                      ('support_vectors', 'dual_coef', 'intercept', 'n_support', 'classes')]
+            self.models[kernel] = KernelModel(kernel, self.metadata['kernels'][kernel], *arrays)
+        return self.models[kernel]
+
+    def predict(self, X, kernels=None):
+        """
+        Parameters:
+            X (np.ndarray): Samples x features, in the order of metadata['features']
+            kernels (list): Kernels to use, all saved kernels by default
+
+        Returns:
+            Dict kernel -> predicted class of every sample.
+        """
+        X = np.atleast_2d(np.asarray(X, dtype=float))
+        if X.shape[1] != len(self.metadata['features']):
+            raise ValueError('Expected %d features: %s'
+                             % (len(self.metadata['features']), ', '.join(self.metadata['features'])))
+        return {kernel: self.model(kernel).predict(X) for kernel in kernels or self.kernels}
+
+
+def read_chunks(lines, features, fmt, delimiter=',', chunk_size=10000):
+    """
+    Parse samples from csv or json lines, chunk_size rows at a time.
+
+    A csv file may start with a header, its columns are then picked by the
+    feature names. Without a header the first columns are the features,
+    in the order of the model, so the dataset files can be used as they are:
+    a row has the features and at most the target after them, other widths
+    are rejected as samples of a different dataset.
+    A json line is an object with the feature names as keys or a list.
+
+    Yields:
+        np.ndarray: Samples x features of every chunk
+    """
+    lines = (line for line in lines if line.strip())
+    columns = None
+
+    if fmt == 'csv':
+        first = next(lines, None)
+        if first is None:
+            return
+        try:
+            width = len([float(value) for value in first.split(delimiter)])
+        except ValueError:
+            width = None
+
+        if width is not None:
+            if width not in (len(features), len(features) + 1):
+                raise ValueError('Expected %d features, optionally followed by the target, '
+                                 'got %d columns' % (len(features), width))
+            lines = itertools.chain([first], lines)
+            columns = list(range(len(features)))
+        else:
+            header = [name.strip() for name in first.split(delimiter)]
+            missing = [feature for feature in features if feature not in header]
+            if missing:
+                raise ValueError('Missing columns: ' + ', '.join(missing))
+            columns = [header.index(feature) for feature in features]
+
+    while True:
+        chunk = list(itertools.islice(lines, chunk_size))
+        if not chunk:
+            return
+        if fmt == 'csv':
+            yield np.loadtxt(chunk, delimiter=delimiter, ndmin=2, usecols=columns)
+        else:
+            samples = [json.loads(line) for line in chunk]
+            yield np.array([[sample[feature] for feature in features] if isinstance(sample, dict)
+                            else sample for sample in samples], dtype=float)
+
+
+def predict_stream(model_file, lines, out, fmt, kernels=None, delimiter=',', chunk_size=10000):
+    """
+    Predict every sample of the lines with the selected kernels and write
+    the results to out chunk by chunk.
+
+    Parameters:
+        model_file (ModelFile): Models to use
+        lines (iterable): Lines of csv or json lines text
+        out (file): Where the results are written, same format as the input
+        fmt (str): 'csv' or 'jsonl'
+        kernels (list): Kernels to use, all saved kernels by default
+        delimiter (str): Csv column delimiter
+        chunk_size (int): Samples predicted at once
+
+    Returns:
+        int: Number of predicted samples.
+    """
+    kernels = kernels or model_file.kernels
+    features = model_file.metadata['features']
+    if fmt == 'csv':
+        out.write(delimiter.join(['row'] + kernels) + '\n')
+
+    row = 0
+    for X in read_chunks(lines, features, fmt, delimiter, chunk_size):
+        predictions = model_file.predict(X, kernels)
+        columns = [predictions[kernel].tolist() for kernel in kernels]
+        for values in zip(*columns):
+            if fmt == 'csv':
+                out.write(delimiter.join([str(row)] + [str(value) for value in values]) + '\n')
+            else:
+                out.write(json.dumps(dict(zip(['row'] + kernels, (row,) + values))) + '\n')
+            row += 1
+        out.flush()
+    return row
+
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(description='Predict with the saved SVM models')
+    parser.add_argument('--model', dest='model', required=True,
+                        help='Model file written by train.py')
+    parser.add_argument('--kernels', dest='kernels', nargs='+',
+                        help='Kernels to use, all saved kernels by default')
+    parser.add_argument('--values', dest='values', type=float, nargs='+',
+                        help='Feature values of one sample, the example sample by default')
+    parser.add_argument('--input', dest='input',
+                        help='Csv or json lines file of samples, - reads stdin')
+    parser.add_argument('--format', dest='format', choices=('csv', 'jsonl'),
+                        help='Format of --input, by default from the file extension (csv for stdin)')
+    parser.add_argument('--delimiter', dest='delimiter', default=',',
+                        help='Csv column delimiter')
+    parser.add_argument('--output', dest='output',
+                        help='File for the predictions of --input, stdout by default')
+    parser.add_argument('--chunk-size', dest='chunk_size', type=int, default=10000,
+                        help='Samples predicted at once')
+    return parser
+
+
+if __name__ == '__main__':
+    args = build_arg_parser().parse_args()
+    model_file = ModelFile(args.model)
+    metadata = model_file.metadata
+
+    if args.input:
+        fmt = args.format or ('jsonl' if args.input.endswith(('.jsonl', '.json')) else 'csv')
+        source = sys.stdin if args.input == '-' else open(args.input, 'r', encoding='UTF-8')
+        out = open(args.output, 'w', encoding='UTF-8') if args.output else sys.stdout
+        with source, out:
+            predict_stream(model_file, source, out, fmt, args.kernels, args.delimiter,
+                           args.chunk_size)
+        raise SystemExit
+    values = args.values or metadata['example']
+
+    print(metadata['target'] + ' of ' + ', '.join('%s = %s' % (feature, value) for feature, value
+                                                  in zip(metadata['features'], values)) + ' is equal :')
+    for kernel, prediction in model_file.predict([values], args.kernels).items():
+        print('%s kernel type: %s %s' % (kernel.capitalize(), prediction[0], metadata['unit']))
@@ -11,6 +11,10 @@ pip install matplotlib
 pip install seaborn
 pip install sklearn
 
+To fit the models once and predict without refitting:
+python train.py --dataset attack_range
+python predict.py --model models/attack_range.npz
+
 Research: Attack range of a player playing in the Polish volleyball league
 
 Data {x}:
@@ -33,37 +37,43 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 from sklearn import svm
 
+from datasets import ATTACK_RANGE, load
+
 
-# parsing csv file data
-args_x = ['Height', 'Weight', 'Age', 'Training internship']
+if __name__ == '__main__':
+    # parsing csv file data
+    args_x = ATTACK_RANGE['features']
 
-data = pd.read_csv('dane.csv', delimiter=',', names=['Height', 'Weight', 'Age', 'Training internship', 'Jump'])
-data.head()
+    # Columns come from the binary cache, the csv is only parsed when it changes
+    features, targets = load(ATTACK_RANGE)
+    data = pd.DataFrame(features, columns=args_x)
+    data[ATTACK_RANGE['target']] = targets
+    data.head()
 
-sns.pairplot(data, x_vars=args_x, y_vars=['Jump'], kind="reg")
+    sns.pairplot(data, x_vars=args_x, y_vars=['Jump'], kind="reg")
 
-plt.show()
-print('Data correlation')
-print(data.corr())
+    plt.show()
+    print('Data correlation')
+    print(data.corr())
 
-X = data[args_x]
-y = data['Jump']
+    X = data[args_x]
+    y = data['Jump']
 
-# Fit the SVM model with different kernel types
-svc_linear = svm.SVC(kernel="linear").fit(X.values, y)
-svc_poly = svm.SVC(kernel="poly").fit(X.values, y)
-svc_rbf = svm.SVC(kernel="rbf").fit(X.values, y)
-svc_sigmoid = svm.SVC(kernel="sigmoid").fit(X.values, y)
+    # Fit the SVM model with different kernel types
+    svc_linear = svm.SVC(kernel="linear").fit(X.values, y)
+    svc_poly = svm.SVC(kernel="poly").fit(X.values, y)
+    svc_rbf = svm.SVC(kernel="rbf").fit(X.values, y)
+    svc_sigmoid = svm.SVC(kernel="sigmoid").fit(X.values, y)
 
-height = 199
-weight = 90
-age = 18
-training_internship = 1
+    height = 199
+    weight = 90
+    age = 18
+    training_internship = 1
 
-print(
-    f"Attack range of a player with height {height}, weight {weight}, age {age} and training internship "
-    f"{training_internship} is equal : ")
-print(f"Linear kernel type: ", svc_linear.predict([[height, weight, age, training_internship]]), "cm")
-print(f"Poly kernel type: ", svc_poly.predict([[height, weight, age, training_internship]]), "cm")
-print(f"Rbf kernel type: ", svc_rbf.predict([[height, weight, age, training_internship]]), "cm")
-print(f"Sigmoid kernel type: ", svc_sigmoid.predict([[height, weight, age, training_internship]]), "cm")
+    print(
+        f"Attack range of a player with height {height}, weight {weight}, age {age} and training internship "
+        f"{training_internship} is equal : ")
+    print(f"Linear kernel type: ", svc_linear.predict([[height, weight, age, training_internship]]), "cm")
+    print(f"Poly kernel type: ", svc_poly.predict([[height, weight, age, training_internship]]), "cm")
+    print(f"Rbf kernel type: ", svc_rbf.predict([[height, weight, age, training_internship]]), "cm")
+    print(f"Sigmoid kernel type: ", svc_sigmoid.predict([[height, weight, age, training_internship]]), "cm")
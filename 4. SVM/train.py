@@ -0,0 +1,122 @@
+# https://scikit-learn.org/stable/modules/svm.html#svm-mathematical-formulation
+# https://numpy.org/doc/stable/reference/generated/numpy.savez.html
+
+"""
+Fit the SVM models of a dataset once and save them for predict.py.
+
+The file is an .npz with the support vectors, dual coefficients and
+intercepts of every kernel, plus json metadata: feature order, target,
+kernel parameters and the hash of the data the models were fitted on.
+Nothing is pickled, so predict.py does not need scikit-learn to load it:
+
+    python train.py --dataset wine --output models/wine.npz
+    python predict.py --model models/wine.npz
+"""
+
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+from sklearn import svm
+
+import datasets
+import predict
+
+
+def train(dataset, kernels=datasets.KERNELS, path=None, params=None):
+    """
+    Parameters:
+        dataset (dict): One of datasets.DATASETS
+        kernels (list): Kernels to fit
+        path (str): Csv file, the dataset's file by default
+        params (dict): Kernel -> extra svm.SVC parameters, like C and gamma
+
+    Returns:
+        Tuple of a dict kernel -> fitted svm.SVC and the metadata of the models.
+    """
+    path = path or dataset['path']
+    X, y = datasets.load(dataset, path)
+
+    models = {}
+    fit_times = {}
+    for kernel in kernels:
+        start = time.perf_counter()
+        models[kernel] = svm.SVC(kernel=kernel, **(params or {}).get(kernel, {})).fit(X, y)
+        fit_times[kernel] = time.perf_counter() - start
+
+    metadata = {'features': dataset['features'],
+                'target': dataset['target'],
+                'unit': dataset['unit'],
+                'example': dataset['example'],
+                'data_hash': datasets.file_hash(path),
+                'rows': len(X),
+                'fit_times': fit_times,
+                'kernels': {kernel: {'C': float(model.C),
+                                     'gamma': float(model._gamma),
+                                     'coef0': float(model.coef0),
+                                     'degree': int(model.degree)}
+                            for kernel, model in models.items()}}
+    return models, metadata
+
+
+def save_models(path, models, metadata):
+    """
+    Save fitted svm.SVC models and their metadata to an .npz file.
+    """
+    arrays = {}
+    for kernel, model in models.items():
+        arrays[kernel + '.support_vectors'] = model.support_vectors_
+        arrays[kernel + '.dual_coef'] = model.dual_coef_
+        arrays[kernel + '.intercept'] = model.intercept_
+        arrays[kernel + '.n_support'] = model.n_support_
+        arrays[kernel + '.classes'] = model.classes_
+
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    np.savez(path, metadata=json.dumps(metadata), **arrays)
+
+
+def check_models(path, models, X):
+    """
+    Compare the predictions of a saved model file with the fitted models.
+
+    Parameters:
+        path (str): Model file written by save_models
+        models (dict): Kernel -> fitted svm.SVC
+        X (np.ndarray): Samples x features to predict
+
+    Returns:
+        Dict kernel -> number of samples predicted differently.
+    """
+    saved = predict.ModelFile(path).predict(X, list(models))
+    return {kernel: int((saved[kernel] != model.predict(X)).sum()) for kernel, model in models.items()}
+
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(description='Fit the SVM models of a dataset and save them')
+    parser.add_argument('--dataset', dest='dataset', choices=datasets.DATASETS, required=True,
+                        help='Dataset to fit')
+    parser.add_argument('--data', dest='data',
+                        help='Csv file, the dataset\'s file by default')
+    parser.add_argument('--kernels', dest='kernels', nargs='+', choices=datasets.KERNELS,
+                        default=list(datasets.KERNELS), help='Kernels to fit')
+    parser.add_argument('--output', dest='output',
+                        help='Model file to write, models/<dataset>.npz by default')
+    return parser
+
+
+if __name__ == '__main__':
+    args = build_arg_parser().parse_args()
+    output = args.output or os.path.join('models', args.dataset + '.npz')
+
+    models, metadata = train(datasets.DATASETS[args.dataset], args.kernels, args.data)
+    save_models(output, models, metadata)
+
+    X, _ = datasets.load(datasets.DATASETS[args.dataset], args.data)
+    mismatches = check_models(output, models, X)
+    for kernel, seconds in metadata['fit_times'].items():
+        print('%-8s fitted in %.3f s, %d of %d rows predicted differently by the saved model'
+              % (kernel, seconds, mismatches[kernel], len(X)))
+    print('Saved', len(models), 'models to', output)